@@ -1,10 +1,14 @@
 # difficulty_engine.py
 from __future__ import annotations
-from typing import Tuple
+from typing import Iterable, List, Tuple
 import math
+import numpy as np
 
 LEVELS = ["easy", "medium", "hard"]
 LEVEL_SCORE = {"easy": 0.25, "medium": 0.5, "hard": 0.85}
+# level codes for the batch API: index into LEVELS
+LEVEL_CODE = {lvl: i for i, lvl in enumerate(LEVELS)}
+LEVEL_SCORE_ARR = np.array([LEVEL_SCORE[lvl] for lvl in LEVELS], dtype=np.float64)
 
 def _ema(prev: float, value: float, alpha: float = 0.2) -> float:
     return alpha * value + (1 - alpha) * prev
@@ -47,3 +51,48 @@ def adjust_difficulty(
         new_level = current_level
 
     return new_level, round(new_ema, 4)
+
+
+def encode_levels(levels: Iterable[str]) -> np.ndarray:
+    """Level names -> int8 codes (index into LEVELS)."""
+    return np.array([LEVEL_CODE[lvl] for lvl in levels], dtype=np.int8)
+
+def decode_levels(codes: np.ndarray) -> List[str]:
+    return [LEVELS[c] for c in codes]
+
+def _round_like_python(x: np.ndarray, ndigits: int) -> np.ndarray:
+    """Vectorized round() matching Python's correctly-rounded float rounding."""
+    scale = 10.0 ** ndigits
+    y = x * scale
+    r = np.round(y) / scale
+    # x * scale is inexact, so near-.5 cases may round the wrong way; redo those exactly
+    near_tie = np.flatnonzero(np.abs(np.abs(y - np.trunc(y)) - 0.5) < 1e-6)
+    if near_tie.size:
+        r[near_tie] = [round(v, ndigits) for v in x[near_tie].tolist()]
+    return r
+
+def adjust_difficulty_batch(
+    accuracy: np.ndarray,
+    avg_time: np.ndarray,
+    hints_used: np.ndarray,
+    level_codes: np.ndarray,
+    user_ema: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized adjust_difficulty over a cohort.
+    Returns (new_level_codes, new_ema); element-wise identical to the scalar
+    function, which remains the reference.
+    """
+    acc = np.clip(np.asarray(accuracy, dtype=np.float64), 0.0, 1.0)
+    tnorm = 1.0 / (1.0 + np.log1p(np.asarray(avg_time, dtype=np.float64) / 120.0))
+    hint_pen = np.clip(np.asarray(hints_used, dtype=np.float64) / 10.0, 0.0, 1.0)
+
+    raw_score = 0.62 * acc + 0.28 * tnorm - 0.10 * hint_pen
+    alpha = 0.18
+    new_ema = alpha * raw_score + (1 - alpha) * np.asarray(user_ema, dtype=np.float64)
+
+    codes = np.asarray(level_codes, dtype=np.int8)
+    delta = new_ema - LEVEL_SCORE_ARR[codes]
+    step = np.where(delta > 0.12, 1, np.where(delta < -0.12, -1, 0))
+    new_codes = np.clip(codes + step, 0, len(LEVELS) - 1).astype(np.int8)
+    return new_codes, _round_like_python(new_ema, 4)
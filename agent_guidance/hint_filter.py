@@ -1,48 +1,202 @@
 # hint_filter.py
 from __future__ import annotations
+import hashlib
 import re
-from typing import Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
 from typing import Any
 
+from instrumentation.metrics import get_metrics
+
 CODE_PATTERNS = [
     r"\bdef\b", r"\bclass\b", r"\bimport\b", r"\bfor\b", r"\bwhile\b",
     r"\{.*\}", r"<.*?>", r"->", r"return\s+", r";\s*$", r"printf\(", r"std::"
 ]
 
+REMOVED_CODE = "Hint removed: contains code. Provide conceptual explanation only."
+REMOVED_CLASSIFIER = "Hint removed: contains code-like content. Use conceptual language."
+CODE_FENCE = re.compile(r"```.*?```", flags=re.S)
+
+
+def _combine(patterns: List[str]) -> re.Pattern:
+    """One alternation with a named group per rule, so a single scan reports which fired."""
+    return re.compile("|".join(f"(?P<r{i}>{p})" for i, p in enumerate(patterns)))
+
+
+class VerdictCache:
+    """
+    Thread-safe LRU (+ optional TTL) of filtered hint outputs.
+    Keys are digests of the normalized hint plus the filter configuration.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (self.ttl is None or entry[1] > time.monotonic()):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._data[key]  # expired
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: str):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else 0.0
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
 class HintFilter:
     """
     Ensures hints are conceptual only. Optionally accept a classifier (model)
     with .predict_proba([text]) -> [prob_code].
+    Pass a VerdictCache (shareable between threads/filters) to reuse verdicts;
+    replacing the classifier or the pattern list invalidates it.
     """
 
-    def __init__(self, classifier: Optional[Any] = None):
-        self.classifier = classifier
-        self.patterns = [re.compile(p) for p in CODE_PATTERNS]
+    def __init__(self, classifier: Optional[Any] = None, patterns: Optional[List[str]] = None,
+                 cache: Optional[VerdictCache] = None):
+        self.cache = cache
+        self._classifier = classifier
+        self._compile(patterns or CODE_PATTERNS)
+
+    @property
+    def classifier(self) -> Optional[Any]:
+        return self._classifier
+
+    @classifier.setter
+    def classifier(self, classifier: Optional[Any]):
+        self._classifier = classifier
+        self._update_config_key()
+        self.invalidate_cache()
+
+    @property
+    def pattern_list(self) -> List[str]:
+        return self._pattern_list
+
+    @pattern_list.setter
+    def pattern_list(self, patterns: List[str]):
+        self._compile(patterns)
+        self.invalidate_cache()
+
+    @property
+    def patterns(self) -> Tuple[re.Pattern, ...]:
+        """Compiled pattern_list (read-only; assign pattern_list to change the rules)."""
+        return self._patterns
+
+    def _compile(self, patterns: List[str]):
+        self._pattern_list = list(patterns)
+        self._patterns = tuple(re.compile(p) for p in self._pattern_list)
+        self.combined = _combine(self._pattern_list)
+        self._update_config_key()
+
+    def _update_config_key(self):
+        # part of every cache key, so filters configured differently can share a cache
+        clf = self._classifier
+        config = f"{self._pattern_list!r}|{type(clf).__qualname__}:{id(clf)}"
+        self._config_key = hashlib.sha256(config.encode()).hexdigest()[:16]
+
+    def invalidate_cache(self):
+        """Drop cached verdicts, e.g. after retraining the classifier in place."""
+        if self.cache is not None:
+            self.cache.clear()
+
+    def _cache_key(self, text: str) -> str:
+        return self._config_key + hashlib.sha256(text.strip().encode()).hexdigest()
+
+    def matched_rule(self, text: str) -> Optional[str]:
+        """Return the first code pattern found in text (leftmost match), or None."""
+        m = self.combined.search(text)
+        if m is None:
+            return None
+        return self.pattern_list[int(m.lastgroup[1:])]
 
     def _contains_code_by_regex(self, text: str) -> bool:
-        low = text
-        for pat in self.patterns:
-            if pat.search(low):
-                return True
-        return False
+        return self.combined.search(text) is not None
 
-    def filter_hint(self, text: str) -> str:
-        # 1. quick regex block
-        if self._contains_code_by_regex(text):
-            return "Hint removed: contains code. Provide conceptual explanation only."
-
-        # 2. classifier if available
-        if self.classifier:
-            try:
-                proba = self.classifier.predict_proba([text])[0]
-                # assume classifier returns [prob_non_code, prob_code]
-                prob_code = proba[-1]
-                if prob_code > 0.35:
-                    return "Hint removed: contains code-like content. Use conceptual language."
-            except Exception:
-                pass
-
-        # 3. sanitize backticks and code fences
-        text = re.sub(r"```.*?```", "", text, flags=re.S)
+    def _sanitize(self, text: str) -> str:
+        # sanitize backticks and code fences
+        text = CODE_FENCE.sub("", text)
         text = text.replace("`", "")
         return text.strip()
+
+    def _classify(self, texts: List[str]) -> Optional[List[bool]]:
+        """One predict_proba call for all texts; True means code-like. None if the classifier failed."""
+        if not self.classifier or not texts:
+            return [False] * len(texts)
+        try:
+            with get_metrics().timer("hint_filter.classifier"):
+                probas = self.classifier.predict_proba(texts)
+            # assume classifier returns [prob_non_code, prob_code] per text
+            return [proba[-1] > 0.35 for proba in probas]
+        except Exception:
+            return None
+
+    def filter_hint(self, text: str) -> str:
+        return self.filter_hints([text])[0]
+
+    def filter_hints(self, texts: Iterable[str]) -> List[str]:
+        """Batched filter_hint: regex-clean texts share a single classifier call."""
+        texts = list(texts)
+        out: List[Optional[str]] = [None] * len(texts)
+        keys: List[Optional[str]] = [None] * len(texts)
+        todo = []
+        # 0. verdict cache
+        for i, text in enumerate(texts):
+            if self.cache is not None:
+                keys[i] = self._cache_key(text)
+                out[i] = self.cache.get(keys[i])
+            if out[i] is None:
+                todo.append(i)
+
+        pending = []
+        # 1. quick regex block
+        for i in todo:
+            text = texts[i]
+            if self._contains_code_by_regex(text):
+                out[i] = REMOVED_CODE
+            else:
+                pending.append(i)
+
+        # 2. classifier if available; on failure texts pass through but are not cached
+        flagged = self._classify([texts[i] for i in pending])
+        classified = flagged is not None
+        if not classified:
+            flagged = [False] * len(pending)
+        metrics = get_metrics()
+        metrics.incr("hint_filter.checked", len(todo))
+        metrics.incr("hint_filter.regex_blocked", len(todo) - len(pending))
+        metrics.incr("hint_filter.classifier_blocked", sum(flagged))
+
+        # 3. sanitize
+        for i, is_code in zip(pending, flagged):
+            out[i] = REMOVED_CLASSIFIER if is_code else self._sanitize(texts[i])
+
+        if self.cache is not None:
+            for i in (todo if classified else set(todo) - set(pending)):
+                self.cache.put(keys[i], out[i])
+        return out
@@ -0,0 +1,257 @@
+# engine.py
+from __future__ import annotations
+import json
+import multiprocessing
+import os
+import queue
+import time
+import traceback
+import zlib
+from datetime import date, datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from adaptive_difficulty.difficulty_engine import LEVEL_CODE, LEVELS, adjust_difficulty_batch
+from brain_memory.memory_store import MemoryStore
+from proficiency_scoring.scoring_engine import ProficiencyTracker, epoch_day
+from spaced_repetition.columnar import ColumnarScheduler
+
+# attempt event (one JSON object per line):
+#   {"user_id": 7, "qid": "Q12", "topic": "Trees", "correct": true,
+#    "time_s": 42.0, "hints_used": 1, "date": "2026-10-18"}   # or "ts": unix seconds
+DEFAULT_LEVEL = "medium"
+DEFAULT_EMA = 0.5
+
+
+def read_jsonl(path: str) -> Iterator[Dict]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _event_day(event: Dict) -> date:
+    if event.get("date"):
+        return datetime.fromisoformat(str(event["date"])).date()
+    if event.get("ts") is not None:
+        return datetime.fromtimestamp(float(event["ts"])).date()
+    return date.today()
+
+
+def shard_of(user_id: Any, shards: int) -> int:
+    """Stable across processes and runs (unlike hash())."""
+    return zlib.crc32(repr(user_id).encode()) % shards
+
+
+class ShardState:
+    """
+    All learner state for one shard of users, updated one micro-batch at a time:
+    MemoryStore (short-term + topic counters), per (user, topic) difficulty
+    level/EMA, ColumnarScheduler reviews and ProficiencyTracker statistics.
+    """
+
+    def __init__(self, shard: int = 0):
+        self.shard = shard
+        self.memory = MemoryStore()
+        self.levels: Dict[Tuple[Any, str], Tuple[int, float]] = {}
+        self.scheduler = ColumnarScheduler()
+        self.proficiency = ProficiencyTracker()
+        self.events = 0
+        self.batches = 0
+        self.last_day: Optional[date] = None
+
+    def process_batch(self, events: List[Dict]):
+        if not events:
+            return
+        days = [_event_day(e) for e in events]
+        for e in events:
+            self.memory.record_attempt(e["user_id"], e["topic"], bool(e["correct"]))
+        self._update_difficulty(events)
+
+        # scheduler: one vectorized update per distinct day in the batch
+        by_day: Dict[date, List[int]] = {}
+        for i, d in enumerate(days):
+            by_day.setdefault(d, []).append(i)
+        for d in sorted(by_day):
+            idx = by_day[d]
+            self.scheduler.update_reviews([events[i]["user_id"] for i in idx], [events[i]["qid"] for i in idx],
+                                          [bool(events[i]["correct"]) for i in idx], d)
+
+        for e, d in zip(events, days):
+            self.proficiency.record(e["user_id"], e["topic"], bool(e["correct"]),
+                                    float(e.get("time_s", 0.0)), epoch_day(d))
+        self.events += len(events)
+        self.batches += 1
+        batch_last = max(days)
+        self.last_day = batch_last if self.last_day is None else max(self.last_day, batch_last)
+
+    def _update_difficulty(self, events: List[Dict]):
+        # repeated (user, topic) pairs in a batch are applied in order, one round per repeat
+        rounds: List[List[int]] = []
+        seen: Dict[Tuple[Any, str], int] = {}
+        for i, e in enumerate(events):
+            key = (e["user_id"], e["topic"])
+            r = seen.get(key, 0)
+            seen[key] = r + 1
+            if r == len(rounds):
+                rounds.append([])
+            rounds[r].append(i)
+        default = (LEVEL_CODE[DEFAULT_LEVEL], DEFAULT_EMA)
+        for idx in rounds:
+            keys = [(events[i]["user_id"], events[i]["topic"]) for i in idx]
+            state = [self.levels.get(k, default) for k in keys]
+            codes, emas = adjust_difficulty_batch(
+                np.array([1.0 if events[i]["correct"] else 0.0 for i in idx]),
+                np.array([float(events[i].get("time_s", 0.0)) for i in idx]),
+                np.array([int(events[i].get("hints_used", 0)) for i in idx]),
+                np.array([c for c, _ in state], dtype=np.int8),
+                np.array([m for _, m in state]),
+            )
+            for k, c, m in zip(keys, codes.tolist(), emas.tolist()):
+                self.levels[k] = (c, m)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"shard": self.shard, "events": self.events, "batches": self.batches,
+                "learners": len(self.memory), "cards": len(self.scheduler)}
+
+    def export(self, out_dir: str):
+        """Write the shard's final state: memory snapshot plus JSONL tables."""
+        path = os.path.join(out_dir, f"shard-{self.shard}")
+        os.makedirs(path, exist_ok=True)
+        self.memory.save(os.path.join(path, "memory"))
+        with open(os.path.join(path, "difficulty.jsonl"), "w", encoding="utf-8") as f:
+            for (user_id, topic), (code, ema) in self.levels.items():
+                f.write(json.dumps({"user_id": user_id, "topic": topic, "level": LEVELS[code], "ema": ema}) + "\n")
+        today = epoch_day(self.last_day) if self.last_day else None
+        scores = self.proficiency.scores(today)
+        with open(os.path.join(path, "proficiency.jsonl"), "w", encoding="utf-8") as f:
+            for (user_id, topic), score in zip(self.proficiency.keys, scores.tolist()):
+                f.write(json.dumps({"user_id": user_id, "topic": topic, "score": score}) + "\n")
+        s = self.scheduler
+        with open(os.path.join(path, "schedule.jsonl"), "w", encoding="utf-8") as f:
+            for row in range(len(s)):
+                f.write(json.dumps({
+                    "user_id": s.users[s.user[row]], "qid": s.qids[s.qid[row]],
+                    "next_due": date.fromordinal(int(s.next_due[row])).isoformat(),
+                    "interval": int(s.interval[row]), "ease_factor": float(s.ease_factor[row]),
+                }) + "\n")
+
+
+def _worker(shard: int, in_q: Any, out_q: Any, out_dir: Optional[str]):
+    try:
+        state = ShardState(shard)
+        t0 = time.perf_counter()
+        while True:
+            batch = in_q.get()
+            if batch is None:
+                break
+            state.process_batch(batch)
+        if out_dir:
+            state.export(out_dir)
+        out_q.put(("ok", shard, {**state.stats(), "seconds": round(time.perf_counter() - t0, 3)}))
+    except Exception:
+        out_q.put(("error", shard, f"shard {shard}:\n{traceback.format_exc()}"))
+
+
+def _put(q: Any, item: Any, proc: Any) -> bool:
+    # blocks while the shard is behind; False if its worker has died instead
+    while True:
+        try:
+            q.put(item, timeout=1.0)
+            return True
+        except queue.Full:
+            if not proc.is_alive():
+                return False
+
+
+def _collect(out_q: Any, procs: List[Any], poll: float = 1.0) -> Tuple[List[Dict], List[str]]:
+    """One report per worker; a worker that died without reporting (e.g. OOM-killed) becomes an error."""
+    results, errors = [], []
+    pending = set(range(len(procs)))
+    dead_polls: Dict[int, int] = {}
+    while pending:
+        try:
+            status, shard, payload = out_q.get(timeout=poll)
+        except queue.Empty:
+            for shard in list(pending):
+                if procs[shard].is_alive():
+                    continue
+                # a report put just before exit may still be in flight: allow one more poll
+                dead_polls[shard] = dead_polls.get(shard, 0) + 1
+                if dead_polls[shard] > 1:
+                    pending.discard(shard)
+                    errors.append(f"shard {shard}: worker exited with code {procs[shard].exitcode} without reporting")
+            continue
+        pending.discard(shard)
+        (results if status == "ok" else errors).append(payload)
+    return results, errors
+
+
+def _micro_batches(events: Iterable[Dict], shards: int, batch_size: int) -> Iterator[Tuple[int, List[Dict]]]:
+    """Route events to shards by user id, yielding (shard, batch) whenever a shard's batch fills."""
+    buffers: List[List[Dict]] = [[] for _ in range(shards)]
+    for e in events:
+        s = shard_of(e["user_id"], shards)
+        buffers[s].append(e)
+        if len(buffers[s]) >= batch_size:
+            yield s, buffers[s]
+            buffers[s] = []
+    for s, buf in enumerate(buffers):
+        if buf:
+            yield s, buf
+
+
+def run_pipeline(
+    events: Iterable[Dict],
+    workers: Optional[int] = None,
+    batch_size: int = 512,
+    queue_size: int = 8,
+    out_dir: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Stream attempt events through memory, difficulty, spaced repetition and
+    proficiency updates. Returns per-shard stats.
+    - Events are sharded by user id, so each learner's events stay ordered
+      within one worker process.
+    - Each shard receives micro-batches of `batch_size` events through a queue
+      holding at most `queue_size` batches; the reader blocks when a worker
+      falls behind (backpressure).
+    - workers=1 runs in-process. With out_dir, each shard writes its final state.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        state = ShardState(0)
+        t0 = time.perf_counter()
+        it = iter(events)
+        while True:
+            batch = list(islice(it, batch_size))
+            if not batch:
+                break
+            state.process_batch(batch)
+        if out_dir:
+            state.export(out_dir)
+        return [{**state.stats(), "seconds": round(time.perf_counter() - t0, 3)}]
+
+    methods = multiprocessing.get_all_start_methods()
+    ctx = multiprocessing.get_context("fork" if "fork" in methods else None)
+    out_q = ctx.Queue()
+    in_qs = [ctx.Queue(maxsize=queue_size) for _ in range(workers)]
+    procs = [ctx.Process(target=_worker, args=(i, in_qs[i], out_q, out_dir), daemon=True) for i in range(workers)]
+    for p in procs:
+        p.start()
+    try:
+        for shard, batch in _micro_batches(events, workers, batch_size):
+            if not _put(in_qs[shard], batch, procs[shard]):
+                break  # its error report is waiting on out_q
+    finally:
+        for q, p in zip(in_qs, procs):
+            if p.is_alive():
+                _put(q, None, p)
+    results, errors = _collect(out_q, procs)
+    for p in procs:
+        p.join()
+    if errors:
+        raise RuntimeError("pipeline worker failed:\n" + "\n".join(errors))
+    return sorted(results, key=lambda r: r["shard"])
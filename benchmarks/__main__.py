@@ -0,0 +1,62 @@
+# __main__.py
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import sys
+
+from benchmarks.suite import WORKLOADS, compare, run_suite
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def _csv(cast):
+    return lambda s: [cast(x) for x in s.split(",") if x]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Scaling benchmarks for every algorithm module (offline, deterministic fakes).")
+    parser.add_argument("--only", type=_csv(str), help=f"comma list of: {', '.join(WORKLOADS)}")
+    parser.add_argument("--sizes", type=_csv(int), help="override sizes for all size-based workloads")
+    parser.add_argument("--fill", type=_csv(float), help="bank fill ratios for question_generator")
+    parser.add_argument("--ops", type=int, default=200, help="max timed ops per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline report to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown / memory growth ratio")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.only or []) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown workloads: {', '.join(sorted(unknown))}")
+
+    results = run_suite(args.only, args.sizes, args.fill, max_ops=args.ops, seed=args.seed)
+    report = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(), "seed": args.seed},
+        "results": results,
+    }
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["comparison"] = compare(results, json.load(f)["results"], args.tolerance)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    if args.fail_on_regression and any(c["regression"] for c in report.get("comparison", [])):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+# fakes.py
+from __future__ import annotations
+import hashlib
+from typing import List, Union
+import numpy as np
+
+
+def _bucket(token: str, dim: int) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=4).digest(), "big") % dim
+
+
+class FakeEmbedder:
+    """Deterministic SentenceTransformer stand-in: hashed bag of words."""
+
+    def __init__(self, dim: int = 64):
+        self.dim = dim
+
+    def encode(self, texts: Union[str, List[str]], convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        out = np.zeros((len(batch), self.dim), dtype=np.float32)
+        for i, text in enumerate(batch):
+            for tok in text.lower().split():
+                out[i, _bucket(tok, self.dim)] += 1.0
+        return out[0] if single else out
+
+
+class FakeLLM:
+    """Deterministic paraphraser: appends a stable variant tag derived from the text."""
+
+    def paraphrase(self, text: str, difficulty: str = "medium") -> str:
+        tag = hashlib.blake2b(f"{difficulty}:{text}".encode(), digest_size=2).hexdigest()
+        return f"{text} (variant {tag})"
+
+
+class FakeClassifier:
+    """predict_proba stand-in: code probability = share of symbol characters."""
+
+    def predict_proba(self, texts: List[str]) -> List[List[float]]:
+        out = []
+        for text in texts:
+            sym = sum(1 for c in text if c in "()[]=+*/%<>;:") / max(1, len(text))
+            p = min(1.0, sym * 5)
+            out.append([1.0 - p, p])
+        return out
@@ -0,0 +1,175 @@
+# suite.py
+from __future__ import annotations
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from benchmarks.fakes import FakeClassifier, FakeEmbedder, FakeLLM
+
+# a workload builds its state for one size and returns (op(i), number of ops)
+Workload = Callable[[Any, random.Random, int], Tuple[Callable[[int], Any], int]]
+
+WORDS = ["array", "tree", "graph", "sum", "maximum", "minimum", "node", "edge", "path", "sort",
+         "search", "heap", "stack", "queue", "hash", "string", "matrix", "prefix", "window", "cycle"]
+
+
+def _sentence(rng: random.Random, n: int = 10) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def plagiarism(size: int, rng: random.Random, max_ops: int):
+    from plagiarism_check.plagiarism import PlagiarismChecker
+    checker = PlagiarismChecker()
+    checker.model = FakeEmbedder()
+    checker.add_questions((i, f"{_sentence(rng)} #{i}") for i in range(size))
+    queries = [_sentence(rng) for _ in range(max_ops)]
+    return (lambda i: checker.is_plagiarized(queries[i])), len(queries)
+
+
+def question_generator(fill: float, rng: random.Random, max_ops: int):
+    from unique_question_generator.generator import QuestionGenerator
+    probe = QuestionGenerator(llm=FakeLLM(), seed=rng.randrange(1 << 30))
+    every = [probe._hash(probe._llm_paraphrase(base)) for base in probe.space]
+    used = set(rng.sample(every, int(len(every) * fill)))
+    gen = QuestionGenerator(llm=FakeLLM(), used_hashes=used, seed=rng.randrange(1 << 30))
+    ops = min(max_ops, len(every) - len(used))
+    return (lambda i: gen.generate_unique_question("bench", 1)), ops
+
+
+def spaced_repetition(size: int, rng: random.Random, max_ops: int):
+    from spaced_repetition.repetition_scheduler import SpacedRepetitionScheduler
+    today = date(2026, 1, 1)
+    sched = SpacedRepetitionScheduler()
+    for i in range(size):
+        sched.add_question(f"q{i}", today + timedelta(days=rng.randrange(-3, 60)))
+    return (lambda i: sched.get_due_today(today, limit=20)), max_ops
+
+
+def memory_context(size: int, rng: random.Random, max_ops: int):
+    from brain_memory.memory_context import MemoryContext
+    mem = MemoryContext()
+    topics = [f"topic{i}" for i in range(size)]
+    for _ in range(3 * size):
+        mem.record_attempt(rng.choice(topics), rng.random() < 0.6)
+    picks = [(rng.choice(topics), rng.random() < 0.6) for _ in range(max_ops)]
+
+    def op(i):
+        mem.record_attempt(*picks[i])
+        return mem.analyze_weakness(top_k=5)
+    return op, max_ops
+
+
+def hint_filter(size: int, rng: random.Random, max_ops: int):
+    from agent_guidance.hint_filter import HintFilter
+    hf = HintFilter(classifier=FakeClassifier())
+    hints = [f"Think about how the {_sentence(rng, 6)} changes" for _ in range(size)]
+    return (lambda i: hf.filter_hint(hints[i % size])), max_ops
+
+
+def proficiency(size: int, rng: random.Random, max_ops: int):
+    from proficiency_scoring.scoring_engine import compute_proficiency
+    today = date(2026, 1, 1)
+    topics = {}
+    for i in range(size):
+        total = rng.randrange(1, 50)
+        topics[f"topic{i}"] = {"correct": rng.randrange(total + 1), "total": total,
+                               "avg_time": rng.random() * 200,
+                               "last_attempt_date": (today - timedelta(days=rng.randrange(90))).isoformat()}
+    ops = max(1, min(max_ops, 20))
+    return (lambda i: compute_proficiency(topics)), ops
+
+
+def session_builder(size: int, rng: random.Random, max_ops: int):
+    from session_builder.session_builder import QuestionPool, build_session
+    pool = QuestionPool({"id": i, "week": i % 12, "topic": f"t{i % 40}"} for i in range(size))
+    learners = [([rng.randrange(size) for _ in range(8)], [rng.randrange(size) for _ in range(4)],
+                 [rng.randrange(size) for _ in range(2)]) for _ in range(max_ops)]
+    r = random.Random(rng.randrange(1 << 30))
+    return (lambda i: build_session(*learners[i], week_filter=[1, 2, 3], all_questions_pool=pool, rng=r)), max_ops
+
+
+WORKLOADS: Dict[str, Tuple[Workload, List[Any], str]] = {
+    "plagiarism": (plagiarism, [1_000, 10_000, 50_000], "corpus_size"),
+    "question_generator": (question_generator, [0.0, 0.5, 0.9], "fill_ratio"),
+    "spaced_repetition": (spaced_repetition, [1_000, 10_000, 100_000], "cards"),
+    "memory_context": (memory_context, [100, 1_000, 10_000], "topics"),
+    "hint_filter": (hint_filter, [100, 1_000], "distinct_hints"),
+    "proficiency": (proficiency, [100, 1_000, 10_000], "topics"),
+    "session_builder": (session_builder, [1_000, 10_000, 100_000], "pool_size"),
+}
+
+
+def run_case(name: str, size: Any, max_ops: int = 200, seed: int = 0) -> Dict[str, Any]:
+    """Time every op of one (workload, size) case, then replay it under tracemalloc for peak memory."""
+    workload, _, param = WORKLOADS[name]
+    t0 = time.perf_counter()
+    op, n = workload(size, random.Random(seed), max_ops)
+    setup_s = time.perf_counter() - t0
+
+    lat = np.empty(n, dtype=np.float64)
+    start = time.perf_counter()
+    for i in range(n):
+        s = time.perf_counter()
+        op(i)
+        lat[i] = time.perf_counter() - s
+    elapsed = time.perf_counter() - start
+
+    # separate pass: tracemalloc slows everything down, so it never overlaps the timing
+    tracemalloc.start()
+    op, n_mem = workload(size, random.Random(seed), min(max_ops, 20))
+    for i in range(n_mem):
+        op(i)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    p50, p95, p99 = np.percentile(lat, [50, 95, 99]) if n else (0.0, 0.0, 0.0)
+    return {
+        "benchmark": name,
+        param: size,
+        "size": size,
+        "ops": n,
+        "setup_s": round(setup_s, 4),
+        "throughput_ops_s": round(n / elapsed, 2) if elapsed > 0 else None,
+        "p50_us": round(p50 * 1e6, 2),
+        "p95_us": round(p95 * 1e6, 2),
+        "p99_us": round(p99 * 1e6, 2),
+        "peak_mem_kb": round(peak / 1024, 1),
+    }
+
+
+def run_suite(names: Optional[List[str]] = None, sizes: Optional[List[int]] = None,
+              fills: Optional[List[float]] = None, max_ops: int = 200, seed: int = 0) -> List[Dict[str, Any]]:
+    results = []
+    for name in names or list(WORKLOADS):
+        _, default_sizes, param = WORKLOADS[name]
+        if param == "fill_ratio":
+            case_sizes = fills or default_sizes
+        else:
+            case_sizes = sizes or default_sizes
+        for size in case_sizes:
+            results.append(run_case(name, size, max_ops=max_ops, seed=seed))
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float = 0.2) -> List[Dict[str, Any]]:
+    """p50 latency and peak memory relative to the baseline; regression if either grows past tolerance."""
+    base = {(r["benchmark"], r["size"]): r for r in baseline}
+    out = []
+    for r in results:
+        b = base.get((r["benchmark"], r["size"]))
+        if b is None:
+            continue
+        p50_ratio = r["p50_us"] / b["p50_us"] if b["p50_us"] else None
+        mem_ratio = r["peak_mem_kb"] / b["peak_mem_kb"] if b["peak_mem_kb"] else None
+        out.append({
+            "benchmark": r["benchmark"],
+            "size": r["size"],
+            "p50_ratio": round(p50_ratio, 3) if p50_ratio is not None else None,
+            "peak_mem_ratio": round(mem_ratio, 3) if mem_ratio is not None else None,
+            "regression": any(x is not None and x > 1 + tolerance for x in (p50_ratio, mem_ratio)),
+        })
+    return out
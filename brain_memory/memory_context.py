@@ -1,52 +1,195 @@
 # memory_context.py
 from __future__ import annotations
-from typing import List, Tuple, Dict, Optional, Any
-from collections import deque, defaultdict
+from typing import Iterable, List, Tuple, Dict, Optional, Any, Union
+from collections import OrderedDict, deque, defaultdict
+import heapq
+import threading
+import weakref
 import numpy as np
 
+from instrumentation.metrics import get_metrics
+from model_registry.registry import get_model
+
 SHORT_TERM_LIMIT = 10
+TOPIC_CACHE_SIZE = 4096
+
+
+class TopicVectorCache:
+    """Thread-safe, size-bounded LRU of topic -> embedding."""
+
+    def __init__(self, maxsize: int = TOPIC_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, topic: str) -> bool:
+        return topic in self._data
+
+    def get(self, topic: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vec = self._data.get(topic)
+            if vec is not None:
+                self._data.move_to_end(topic)
+            return vec
+
+    def put(self, topic: str, vec: np.ndarray):
+        with self._lock:
+            self._data[topic] = vec
+            self._data.move_to_end(topic)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+# one cache per embedding model, shared by every MemoryContext using that model
+_SHARED_TOPIC_CACHES: "weakref.WeakKeyDictionary[Any, TopicVectorCache]" = weakref.WeakKeyDictionary()
+_NAMED_TOPIC_CACHES: Dict[str, TopicVectorCache] = {}  # models referenced by registry name
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_topic_cache(model: Any, maxsize: int = TOPIC_CACHE_SIZE) -> TopicVectorCache:
+    with _SHARED_LOCK:
+        if isinstance(model, str):
+            return _NAMED_TOPIC_CACHES.setdefault(model, TopicVectorCache(maxsize))
+        try:
+            cache = _SHARED_TOPIC_CACHES.get(model)
+            if cache is None:
+                cache = _SHARED_TOPIC_CACHES[model] = TopicVectorCache(maxsize)
+            return cache
+        except TypeError:
+            # model cannot be weak-referenced: fall back to a private cache
+            return TopicVectorCache(maxsize)
+
 
 class MemoryContext:
     """
     Short-term and long-term memory manager.
     - short_term: last N attempts
-    - long_term: per-topic stats and vector (optional embedding)
+    - long_term: per-topic counters in NumPy arrays indexed by interned topic id,
+      with weakness kept current in record_attempt and ranked by a lazy max-heap
+    - topic embeddings live in an LRU shared by all contexts using the same model
+    - embedding_model may be a model object or a registry name (loaded on first use)
     """
 
-    def __init__(self, embedding_model: Optional[Any] = None):
+    def __init__(self, embedding_model: Optional[Union[Any, str]] = None):
         self.short_term = deque(maxlen=SHORT_TERM_LIMIT)  # list of (topic, correct, meta)
-        self.topic_stats = defaultdict(lambda: {"correct": 0, "total": 0})
+        self.topic_ids: Dict[str, int] = {}
+        self.topics: List[str] = []
+        self._correct = np.zeros(16, dtype=np.int64)
+        self._total = np.zeros(16, dtype=np.int64)
+        self._weakness = np.zeros(16, dtype=np.float64)
+        self._version = np.zeros(16, dtype=np.int64)
+        self._heap: List[Tuple[float, int, int]] = []  # (-weakness, topic_id, version)
         self.embedding_model = embedding_model
-        self.topic_vectors: Dict[str, np.ndarray] = {}
+        self.topic_vectors = shared_topic_cache(embedding_model) if embedding_model is not None else TopicVectorCache()
+
+    @property
+    def embedding_model(self) -> Optional[Any]:
+        if self._embedding_model is None and self._model_name:
+            self._embedding_model = get_model(self._model_name)
+            self._model_name = None
+        return self._embedding_model
+
+    @embedding_model.setter
+    def embedding_model(self, model: Optional[Union[Any, str]]):
+        self._model_name = model if isinstance(model, str) else None
+        self._embedding_model = None if isinstance(model, str) else model
+
+    def _topic_id(self, topic: str) -> int:
+        tid = self.topic_ids.get(topic)
+        if tid is None:
+            tid = self.topic_ids[topic] = len(self.topics)
+            self.topics.append(topic)
+            if tid >= self._total.shape[0]:
+                grow = self._total.shape[0]
+                for name in ("_correct", "_total", "_weakness", "_version"):
+                    arr = getattr(self, name)
+                    setattr(self, name, np.concatenate([arr, np.zeros(grow, dtype=arr.dtype)]))
+        return tid
+
+    @property
+    def topic_stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-topic {"correct", "total"} view built from the counters."""
+        return {t: {"correct": int(self._correct[i]), "total": int(self._total[i])}
+                for i, t in enumerate(self.topics)}
 
     def record_attempt(self, topic: str, correct: bool, metadata: Optional[Dict] = None):
         self.short_term.append((topic, correct, metadata or {}))
-        s = self.topic_stats[topic]
-        s["total"] += 1
-        s["correct"] += 1 if correct else 0
-        self.topic_stats[topic] = s
+        tid = self._topic_id(topic)
+        self._total[tid] += 1
+        self._correct[tid] += 1 if correct else 0
+        score = 1.0 - int(self._correct[tid]) / int(self._total[tid])  # simple weakness
+        self._weakness[tid] = score
+        self._version[tid] += 1
+        heapq.heappush(self._heap, (-score, tid, int(self._version[tid])))
+        if len(self._heap) > 4 * len(self.topics) + 64:
+            self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        n = len(self.topics)
+        self._heap = [(-float(self._weakness[i]), i, int(self._version[i])) for i in range(n) if self._total[i]]
+        heapq.heapify(self._heap)
 
     def analyze_weakness(self, top_k: int = 5) -> List[Tuple[str, float]]:
-        """Return topics sorted by weakness score (higher = weaker)"""
-        weakness = {}
-        for t, v in self.topic_stats.items():
-            if v["total"] == 0:
-                continue
-            acc = v["correct"] / v["total"]
-            score = 1.0 - acc  # simple weakness
-            weakness[t] = score
-        sorted_w = sorted(weakness.items(), key=lambda x: x[1], reverse=True)
-        return sorted_w[:top_k]
+        """Return topics sorted by weakness score (higher = weaker), ties in first-seen order."""
+        out, keep = [], []
+        while self._heap and len(out) < top_k:
+            entry = heapq.heappop(self._heap)
+            neg, tid, ver = entry
+            if ver != self._version[tid]:
+                continue  # stale entry, drop it
+            keep.append(entry)
+            out.append((self.topics[tid], -neg))
+        for entry in keep:
+            heapq.heappush(self._heap, entry)
+        return out
 
     def topic_vector(self, topic: str, refresh: bool = False) -> Optional[np.ndarray]:
         """Compute or return cached topic embedding if model provided."""
-        if topic in self.topic_vectors and not refresh:
-            return self.topic_vectors[topic]
-        if self.embedding_model:
-            vec = self.embedding_model.encode(topic, convert_to_numpy=True)
-            self.topic_vectors[topic] = vec
-            return vec
-        return None
+        vecs = self.topic_vectors_for([topic], refresh=refresh)
+        return None if vecs is None else vecs[0]
+
+    def topic_vectors_for(self, topics: Iterable[str], refresh: bool = False) -> Optional[np.ndarray]:
+        """(n, dim) embeddings for `topics`; cache misses are encoded in one model call."""
+        topics = list(topics)
+        found: Dict[str, np.ndarray] = {}
+        if not refresh:
+            for t in topics:
+                vec = self.topic_vectors.get(t)
+                if vec is not None:
+                    found[t] = vec
+        missing = list(dict.fromkeys(t for t in topics if t not in found))
+        if missing:
+            if not self.embedding_model:
+                return None
+            with get_metrics().timer("memory.encode"):
+                vecs = np.atleast_2d(self.embedding_model.encode(missing, convert_to_numpy=True))
+            for t, v in zip(missing, vecs):
+                self.topic_vectors.put(t, v)
+                found[t] = v
+        if not topics:
+            return None
+        return np.stack([found[t] for t in topics])
+
+    def related_weak_topics(self, topic: str, k: int = 5, pool: int = 50) -> List[Tuple[str, float]]:
+        """
+        Weak topics most similar to `topic` by cosine similarity, searched among
+        the `pool` weakest topics with one matrix product.
+        """
+        weak = [t for t, _ in self.analyze_weakness(top_k=pool + 1) if t != topic][:pool]
+        if not weak:
+            return []
+        vecs = self.topic_vectors_for([topic] + weak)
+        if vecs is None:
+            return []
+        vecs = vecs / (np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-12)
+        sims = vecs[1:] @ vecs[0]
+        k = min(k, sims.shape[0])
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top], kind="stable")]
+        return [(weak[i], float(sims[i])) for i in top]
 
     def recent_pattern(self) -> Dict[str, int]:
         """Count recent failures per topic"""
@@ -0,0 +1,180 @@
+# memory_store.py
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import numpy as np
+
+from brain_memory.memory_context import MemoryContext, SHORT_TERM_LIMIT, TopicVectorCache, shared_topic_cache
+
+# arrays written by save(); each is a plain .npy file so load() can memory-map it
+ARRAYS = ("ring_topic", "ring_correct", "ring_head", "ring_len", "correct", "total", "first_seen", "topic_count")
+INDEX_FILE = "index.json"
+
+
+class MemoryStore:
+    """
+    Short-term and long-term memory for many learners in shared preallocated arrays.
+    - ring_topic / ring_correct: (learners, SHORT_TERM_LIMIT) ring buffers of recent attempts
+    - correct / total: (learners, topics) int32 counters, topics interned store-wide
+    - first_seen: (learners, topics) per-learner rank of each topic's first attempt,
+      so ties break in the learner's own first-seen order, as in MemoryContext
+    Per-attempt metadata is not retained. Use learner(user_id) for a MemoryContext-style view.
+    """
+
+    def __init__(self, capacity: int = 1024, topic_capacity: int = 64,
+                 embedding_model: Optional[Any] = None, short_term_limit: int = SHORT_TERM_LIMIT):
+        self.embedding_model = embedding_model
+        self.topic_vectors = shared_topic_cache(embedding_model) if embedding_model is not None else TopicVectorCache()
+        self.short_term_limit = short_term_limit
+        self.user_ids: Dict[Any, int] = {}
+        self.users: List[Any] = []
+        self.topic_ids: Dict[str, int] = {}
+        self.topics: List[str] = []
+        self.ring_topic = np.zeros((capacity, short_term_limit), dtype=np.int32)
+        self.ring_correct = np.zeros((capacity, short_term_limit), dtype=np.int8)
+        self.ring_head = np.zeros(capacity, dtype=np.int32)
+        self.ring_len = np.zeros(capacity, dtype=np.int32)
+        self.correct = np.zeros((capacity, topic_capacity), dtype=np.int32)
+        self.total = np.zeros((capacity, topic_capacity), dtype=np.int32)
+        self.first_seen = np.zeros((capacity, topic_capacity), dtype=np.int32)
+        self.topic_count = np.zeros(capacity, dtype=np.int32)  # distinct topics per learner
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+    def _grow(self, rows: int, cols: int):
+        cap, tcap = self.correct.shape
+        if rows > cap:
+            new_cap = max(rows, 2 * cap)
+            for name in ARRAYS:
+                arr = getattr(self, name)
+                buf = np.zeros((new_cap,) + arr.shape[1:], dtype=arr.dtype)
+                buf[:len(self.users)] = arr[:len(self.users)]
+                setattr(self, name, buf)
+            cap = new_cap
+        if cols > tcap:
+            new_tcap = max(cols, 2 * tcap)
+            for name in ("correct", "total", "first_seen"):
+                arr = getattr(self, name)
+                buf = np.zeros((cap, new_tcap), dtype=arr.dtype)
+                buf[:, :tcap] = arr
+                setattr(self, name, buf)
+
+    def _user_row(self, user_id: Any) -> int:
+        row = self.user_ids.get(user_id)
+        if row is None:
+            row = self.user_ids[user_id] = len(self.users)
+            self._grow(row + 1, len(self.topics))
+            self.users.append(user_id)
+        return row
+
+    def _topic_id(self, topic: str) -> int:
+        tid = self.topic_ids.get(topic)
+        if tid is None:
+            tid = self.topic_ids[topic] = len(self.topics)
+            self._grow(len(self.users), tid + 1)
+            self.topics.append(topic)
+        return tid
+
+    def learner(self, user_id: Any) -> "LearnerMemory":
+        return LearnerMemory(self, self._user_row(user_id))
+
+    def record_attempt(self, user_id: Any, topic: str, correct: bool):
+        row, tid = self._user_row(user_id), self._topic_id(topic)
+        head = self.ring_head[row]
+        self.ring_topic[row, head] = tid
+        self.ring_correct[row, head] = 1 if correct else 0
+        self.ring_head[row] = (head + 1) % self.short_term_limit
+        self.ring_len[row] = min(self.ring_len[row] + 1, self.short_term_limit)
+        if not self.total[row, tid]:
+            self.first_seen[row, tid] = self.topic_count[row]
+            self.topic_count[row] += 1
+        self.total[row, tid] += 1
+        self.correct[row, tid] += 1 if correct else 0
+
+    # ---- snapshots ----
+
+    def save(self, path: str):
+        """Write each array as .npy (used rows/topics only) plus the id tables."""
+        os.makedirs(path, exist_ok=True)
+        n, t = len(self.users), len(self.topics)
+        for name in ARRAYS:
+            arr = getattr(self, name)[:n]
+            if name in ("correct", "total", "first_seen"):
+                arr = arr[:, :t]
+            # write-then-rename: a store mapped from this snapshot keeps its old inode
+            tmp = os.path.join(path, name + ".tmp.npy")
+            np.save(tmp, np.ascontiguousarray(arr))
+            os.replace(tmp, os.path.join(path, name + ".npy"))
+        with open(os.path.join(path, INDEX_FILE), "w", encoding="utf-8") as f:
+            json.dump({"users": self.users, "topics": self.topics,
+                       "short_term_limit": self.short_term_limit}, f)
+
+    @classmethod
+    def load(cls, path: str, embedding_model: Optional[Any] = None, mmap: bool = True) -> "MemoryStore":
+        """
+        Restore a snapshot. With mmap=True arrays are mapped copy-on-write:
+        nothing is read until touched and updates never modify the files.
+        """
+        with open(os.path.join(path, INDEX_FILE), encoding="utf-8") as f:
+            index = json.load(f)
+        store = cls(capacity=1, topic_capacity=1, embedding_model=embedding_model,
+                    short_term_limit=index["short_term_limit"])
+        for name in ARRAYS:
+            file = os.path.join(path, name + ".npy")
+            if os.path.exists(file):
+                setattr(store, name, np.load(file, mmap_mode="c" if mmap else None))
+        if not os.path.exists(os.path.join(path, "first_seen.npy")):
+            # older snapshot: fall back to store-wide topic order, new topics rank after it
+            n, t = store.total.shape
+            store.first_seen = np.broadcast_to(np.arange(t, dtype=np.int32), (n, t)).copy()
+            store.topic_count = np.full(n, t, dtype=np.int32)
+        store.users = index["users"]
+        store.user_ids = {u: i for i, u in enumerate(store.users)}
+        store.topics = index["topics"]
+        store.topic_ids = {t: i for i, t in enumerate(store.topics)}
+        if not store.users or not store.topics:
+            store._grow(max(1, len(store.users)), max(1, len(store.topics)))
+        return store
+
+
+class LearnerMemory(MemoryContext):
+    """MemoryContext API over one learner's row of a MemoryStore."""
+
+    def __init__(self, store: MemoryStore, row: int):
+        # no per-learner state: everything lives in the store's arrays
+        self.store = store
+        self.row = row
+        self.embedding_model = store.embedding_model
+        self.topic_vectors = store.topic_vectors
+
+    @property
+    def short_term(self) -> List[Tuple[str, bool, Dict]]:
+        s, r = self.store, self.row
+        n, head = int(s.ring_len[r]), int(s.ring_head[r])
+        idx = [(head - n + i) % s.short_term_limit for i in range(n)]
+        return [(s.topics[s.ring_topic[r, i]], bool(s.ring_correct[r, i]), {}) for i in idx]
+
+    @property
+    def topic_stats(self) -> Dict[str, Dict[str, int]]:
+        s, r = self.store, self.row
+        t = len(s.topics)
+        seen = np.flatnonzero(s.total[r, :t])
+        seen = seen[np.argsort(s.first_seen[r, seen], kind="stable")]
+        return {s.topics[i]: {"correct": int(s.correct[r, i]), "total": int(s.total[r, i])} for i in seen}
+
+    def record_attempt(self, topic: str, correct: bool, metadata: Optional[Dict] = None):
+        self.store.record_attempt(self.store.users[self.row], topic, correct)
+
+    def analyze_weakness(self, top_k: int = 5) -> List[Tuple[str, float]]:
+        s, r = self.store, self.row
+        t = len(s.topics)
+        total = s.total[r, :t]
+        seen = np.flatnonzero(total)
+        if not seen.size or top_k <= 0:
+            return []
+        weakness = 1.0 - s.correct[r, seen] / total[seen]
+        # full sort: argpartition would pick arbitrarily among ties at the k-th place
+        top = np.lexsort((s.first_seen[r, seen], -weakness))[:top_k]
+        return [(s.topics[seen[i]], float(weakness[i])) for i in top]
@@ -0,0 +1,201 @@
+# metrics.py
+from __future__ import annotations
+import abc
+import bisect
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 3, 5, 8, 12, 20, 50, 100, 250)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class NoopMetrics:
+    """Default sink: every call is a no-op, timers are a shared null context manager."""
+
+    enabled = False
+
+    def timer(self, name: str) -> Any:
+        return _NULL_TIMER
+
+    def incr(self, name: str, n: int = 1):
+        pass
+
+    def observe(self, name: str, value: float, buckets: Optional[Sequence[float]] = None):
+        pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"counters": {}, "histograms": {}}
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics: "InMemoryMetrics", name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, LATENCY_BUCKETS)
+        return False
+
+
+class _Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def add(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class InMemoryMetrics(NoopMetrics):
+    """
+    Thread-safe counters and fixed-bucket histograms.
+    timer(name) records seconds into the histogram `name`.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+        self._histograms: Dict[str, _Histogram] = {}
+
+    def timer(self, name: str) -> _Timer:
+        return _Timer(self, name)
+
+    def incr(self, name: str, n: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def observe(self, name: str, value: float, buckets: Optional[Sequence[float]] = None):
+        with self._lock:
+            hist = self._histograms.get(name)
+            if hist is None:
+                hist = self._histograms[name] = _Histogram(buckets or LATENCY_BUCKETS)
+            hist.add(value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "histograms": {
+                    name: {"buckets": list(h.bounds), "counts": list(h.counts), "sum": h.sum, "count": h.count}
+                    for name, h in self._histograms.items()
+                },
+            }
+
+
+_metrics: NoopMetrics = NoopMetrics()
+
+
+def get_metrics() -> NoopMetrics:
+    return _metrics
+
+
+def set_metrics(metrics: Optional[NoopMetrics]) -> NoopMetrics:
+    """Install a process-wide sink (None restores the no-op default). Returns the previous one."""
+    global _metrics
+    prev, _metrics = _metrics, metrics or NoopMetrics()
+    return prev
+
+
+# ---- exporters ----
+
+class Exporter(abc.ABC):
+    @abc.abstractmethod
+    def export(self, snapshot: Dict[str, Any]):
+        ...
+
+
+class FileExporter(Exporter):
+    """Append one JSON snapshot per export() call to a local file."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, snapshot: Dict[str, Any]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"ts": time.time(), **snapshot}) + "\n")
+
+
+def _prom_name(name: str) -> str:
+    return "".join(c if c.isalnum() or c == "_" else "_" for c in name)
+
+
+def prometheus_text(snapshot: Dict[str, Any]) -> str:
+    """Render a snapshot in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for name, value in sorted(snapshot["counters"].items()):
+        n = _prom_name(name) + "_total"
+        lines += [f"# TYPE {n} counter", f"{n} {value}"]
+    for name, h in sorted(snapshot["histograms"].items()):
+        n = _prom_name(name)
+        lines.append(f"# TYPE {n} histogram")
+        cumulative = 0
+        for bound, count in zip(h["buckets"], h["counts"]):
+            cumulative += count
+            lines.append(f'{n}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{n}_bucket{{le="+Inf"}} {h["count"]}')
+        lines += [f"{n}_sum {h['sum']}", f"{n}_count {h['count']}"]
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusTextExporter(Exporter):
+    """Write the Prometheus text format to a file (e.g. for node_exporter's textfile collector)."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, snapshot: Dict[str, Any]):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(prometheus_text(snapshot))
+
+
+def serve_prometheus(port: int = 9108, host: str = "0.0.0.0", metrics: Optional[NoopMetrics] = None) -> ThreadingHTTPServer:
+    """Serve /metrics for the installed (or given) sink from a daemon thread. Call .shutdown() to stop."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text((metrics or get_metrics()).snapshot()).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -1,47 +1,46 @@
 # main.py
-# main_demo.py
-from unique_question_generator.generator import generate_unique_question
-from plagiarism_check.plagiarism import PlagiarismChecker
-from adaptive_difficulty.difficulty_engine import adjust_difficulty
-from spaced_repetition.repetition_scheduler import schedule_reviews
-from brain_memory.memory_context import analyze_weakness
-from agent_guidance.hint_filter import filter_hint
-from proficiency_scoring.scoring_engine import compute_proficiency
-from session_builder.session_builder import build_session
-from datetime import datetime
-
-print("\n=== UNIQUE QUESTION GENERATOR ===")
-q = generate_unique_question()
-print("Generated Question:", q["question"])
-
-print("\n=== PLAGIARISM CHECK ===")
-checker = PlagiarismChecker()
-checker.add_question(q["question"])
-print("Duplicate?", checker.is_plagiarized(q["question"]))
-
-print("\n=== ADAPTIVE DIFFICULTY ===")
-level = adjust_difficulty(accuracy=0.8, avg_time=25, hints_used=1, current_level="medium")
-print("Next Difficulty Level:", level)
-
-print("\n=== SPACED REPETITION ===")
-history = {"Q1": {"last_seen": datetime.now(), "correct": 2, "incorrect": 0}}
-print("Due for Review:", schedule_reviews(history))
-
-print("\n=== BRAIN MEMORY CONTEXT ===")
-user_history = [("Arrays", True), ("Trees", False), ("Trees", False), ("Graphs", True)]
-print("Weak Topics:", analyze_weakness(user_history))
-
-print("\n=== AGENT GUIDANCE FILTER ===")
-hint = "Use a for loop to iterate the array."
-print("Filtered Hint:", filter_hint(hint))
-
-print("\n=== PROFICIENCY SCORING ===")
-topics = {
-    "Arrays": {"correct": 8, "total": 10, "avg_time": 18},
-    "Trees": {"correct": 4, "total": 10, "avg_time": 40}
-}
-print("Scores:", compute_proficiency(topics))
-
-print("\n=== SESSION BUILDER ===")
-session = build_session(["Q1","Q2","Q3"], ["Q4","Q5"], ["Q6","Q7","Q8","Q9"])
-print("Final Session:", session)
+# replay learner attempt events (JSONL) through every module:
+#   python main.py events.jsonl --workers 8 --out replay_out/
+# with no file, a small built-in sample is replayed in-process
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+
+from attempt_pipeline.engine import read_jsonl, run_pipeline
+
+SAMPLE_EVENTS = [
+    {"user_id": 1, "qid": "Q1", "topic": "Arrays", "correct": True, "time_s": 18, "hints_used": 0, "date": "2026-10-16"},
+    {"user_id": 1, "qid": "Q4", "topic": "Trees", "correct": False, "time_s": 75, "hints_used": 2, "date": "2026-10-16"},
+    {"user_id": 2, "qid": "Q1", "topic": "Arrays", "correct": False, "time_s": 40, "hints_used": 1, "date": "2026-10-17"},
+    {"user_id": 1, "qid": "Q4", "topic": "Trees", "correct": True, "time_s": 35, "hints_used": 1, "date": "2026-10-17"},
+    {"user_id": 2, "qid": "Q7", "topic": "Graphs", "correct": True, "time_s": 22, "hints_used": 0, "date": "2026-10-18"},
+]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay attempt events through memory, difficulty, "
+                                                 "spaced repetition and proficiency updates.")
+    parser.add_argument("events", nargs="?", help="JSONL file, one attempt event per line")
+    parser.add_argument("--workers", type=int, default=None, help="shard processes (default: cpu count; 1 = inline)")
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--queue-size", type=int, default=8, help="max pending batches per shard")
+    parser.add_argument("--out", help="directory for each shard's final state")
+    args = parser.parse_args(argv)
+
+    events = read_jsonl(args.events) if args.events else SAMPLE_EVENTS
+    workers = args.workers if args.events else 1
+    t0 = time.perf_counter()
+    stats = run_pipeline(events, workers=workers, batch_size=args.batch_size,
+                         queue_size=args.queue_size, out_dir=args.out)
+    elapsed = time.perf_counter() - t0
+    total = sum(s["events"] for s in stats)
+    for s in stats:
+        print(json.dumps(s))
+    print(f"{total} events in {elapsed:.2f}s ({total / elapsed if elapsed else 0:.0f} events/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# registry.py
+from __future__ import annotations
+import importlib
+import threading
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterable, Optional
+
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+
+_lock = threading.Lock()
+_modules: Dict[str, Optional[ModuleType]] = {}
+_models: Dict[str, Any] = {}
+_model_locks: Dict[str, threading.Lock] = {}
+
+
+def optional_import(name: str) -> Optional[ModuleType]:
+    """Import a heavy optional dependency on first use; None if it is not installed."""
+    if name in _modules:
+        return _modules[name]
+    with _lock:
+        if name not in _modules:
+            try:
+                _modules[name] = importlib.import_module(name)
+            except Exception:
+                _modules[name] = None
+    return _modules[name]
+
+
+def _load_sentence_transformer(name: str) -> Any:
+    st = optional_import("sentence_transformers")
+    if st is None:
+        return None
+    return st.SentenceTransformer(name)
+
+
+def register_model(name: str, model: Any):
+    """Install an already-built model (or a fake) under `name`."""
+    with _lock:
+        _models[name] = model
+
+
+def get_model(name: str = DEFAULT_MODEL, loader: Optional[Callable[[str], Any]] = None) -> Any:
+    """
+    Process-wide model cache: each name is loaded once and shared by every caller.
+    Returns None when the backend is unavailable or loading failed (not retried).
+    """
+    if name in _models:
+        return _models[name]
+    with _lock:
+        model_lock = _model_locks.setdefault(name, threading.Lock())
+    with model_lock:
+        if name not in _models:
+            try:
+                model = (loader or _load_sentence_transformer)(name)
+            except Exception:
+                model = None
+            with _lock:
+                _models[name] = model
+    return _models[name]
+
+
+def warm_up(names: Iterable[str] = (DEFAULT_MODEL,), modules: Iterable[str] = ("faiss",),
+            background: bool = True) -> Optional[threading.Thread]:
+    """Import optional modules and load models ahead of first use, by default on a daemon thread."""
+    names, modules = list(names), list(modules)
+
+    def run():
+        for mod in modules:
+            optional_import(mod)
+        for name in names:
+            get_model(name)
+
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, name="model-warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,141 @@
+# minhash.py
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+MERSENNE_PRIME = (1 << 31) - 1
+SHINGLE_BASE = 257
+
+
+def optimal_params(threshold: float, num_perm: int, false_positive_weight: float = 0.5,
+                   false_negative_weight: float = 0.5) -> Tuple[int, int]:
+    """
+    (bands, rows) with bands * rows <= num_perm minimizing the weighted area of
+    false positives (Jaccard below threshold that become candidates) plus false
+    negatives (Jaccard above threshold that do not), for P(candidate) = 1 - (1 - s^rows)^bands.
+    """
+    if not 0.0 < threshold < 1.0:
+        raise ValueError("threshold must be in (0, 1).")
+    s = np.linspace(0.0, 1.0, 1001)
+    below = s < threshold
+    ds = s[1] - s[0]
+    best, best_err = (1, num_perm), np.inf
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            p = 1.0 - (1.0 - s ** rows) ** bands
+            err = (false_positive_weight * p[below].sum() + false_negative_weight * (1.0 - p[~below]).sum()) * ds
+            if err < best_err:
+                best, best_err = (bands, rows), err
+    return best
+
+
+class MinHashLSH:
+    """
+    Lexical near-duplicate index: character shingles + MinHash + LSH banding.
+    Pure NumPy, no model needed.
+    - signature: min over shingles of num_perm universal hashes (a*x + b) mod p
+    - banding: the first bands * rows signature values split into `bands` slices;
+      items sharing any slice are candidates, then verified by estimated Jaccard
+      (agreement over the full signature).
+    - bands/rows default to optimal_params(threshold, num_perm), so the
+      candidate S-curve sits at the configured threshold.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: Optional[int] = None,
+                 rows: Optional[int] = None, shingle_size: int = 5, seed: int = 1):
+        if bands is None and rows is None:
+            bands, rows = optimal_params(threshold, num_perm)
+        elif rows is None:
+            rows = num_perm // bands
+        elif bands is None:
+            bands = num_perm // rows
+        if bands < 1 or rows < 1 or bands * rows > num_perm:
+            raise ValueError("bands * rows must be between 1 and num_perm.")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = rows
+        self.shingle_size = shingle_size
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._powers = np.array([pow(SHINGLE_BASE, shingle_size - 1 - j, MERSENNE_PRIME)
+                                 for j in range(shingle_size)], dtype=np.uint64)
+        self._tables: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._sigs = np.empty((0, num_perm), dtype=np.uint32)
+        self._n = 0
+        self.keys: List[Any] = []
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def signatures(self) -> np.ndarray:
+        """(n, num_perm) view over the stored signatures."""
+        return self._sigs[:self._n]
+
+    def config(self) -> Dict[str, int]:
+        return {"num_perm": self.num_perm, "bands": self.bands, "rows": self.rows,
+                "shingle_size": self.shingle_size, "seed": self.seed}
+
+    def _shingles(self, text: str) -> np.ndarray:
+        """Unique rolling hashes of the character k-grams of normalized text."""
+        norm = " ".join(text.lower().split()).encode()
+        data = np.frombuffer(norm, dtype=np.uint8).astype(np.uint64)
+        if data.size == 0:
+            return data
+        k = min(self.shingle_size, data.size)
+        windows = np.lib.stride_tricks.sliding_window_view(data, k)
+        return np.unique((windows * self._powers[-k:]).sum(axis=1) % MERSENNE_PRIME)
+
+    def signature(self, text: str) -> np.ndarray:
+        h = self._shingles(text)
+        if h.size == 0:
+            return np.full(self.num_perm, MERSENNE_PRIME, dtype=np.uint32)
+        perm = (self._a[:, None] * h[None, :] + self._b[:, None]) % MERSENNE_PRIME
+        return perm.min(axis=1).astype(np.uint32)
+
+    def signatures_for(self, texts: Iterable[str]) -> np.ndarray:
+        sigs = [self.signature(t) for t in texts]
+        if not sigs:
+            return np.empty((0, self.num_perm), dtype=np.uint32)
+        return np.stack(sigs)
+
+    def _band_keys(self, sig: np.ndarray) -> List[bytes]:
+        return [sig[b * self.rows:(b + 1) * self.rows].tobytes() for b in range(self.bands)]
+
+    def add_signatures(self, keys: List[Any], sigs: np.ndarray):
+        """Insert precomputed signatures (e.g. loaded from disk) in bulk."""
+        n = sigs.shape[0]
+        if self._n + n > self._sigs.shape[0]:
+            buf = np.empty((max(self._n + n, 2 * self._sigs.shape[0], 64), self.num_perm), dtype=np.uint32)
+            buf[:self._n] = self._sigs[:self._n]
+            self._sigs = buf
+        self._sigs[self._n:self._n + n] = sigs
+        for pos in range(self._n, self._n + n):
+            for table, bk in zip(self._tables, self._band_keys(self._sigs[pos])):
+                table.setdefault(bk, []).append(pos)
+        self._n += n
+        self.keys.extend(keys)
+
+    def add(self, key: Any, text: str):
+        self.add_signatures([key], self.signature(text)[None, :])
+
+    def query_signature(self, sig: np.ndarray, threshold: Optional[float] = None) -> Tuple[Optional[Any], float]:
+        """Return (key, estimated_jaccard) of the best candidate above threshold, else (None, best)."""
+        threshold = self.threshold if threshold is None else threshold
+        cands = set()
+        for table, bk in zip(self._tables, self._band_keys(sig)):
+            cands.update(table.get(bk, ()))
+        if not cands:
+            return None, 0.0
+        idx = np.fromiter(cands, dtype=np.int64, count=len(cands))
+        est = (self._sigs[idx] == sig).mean(axis=1)
+        best = int(np.argmax(est))
+        if est[best] >= threshold:
+            return self.keys[idx[best]], float(est[best])
+        return None, float(est[best])
+
+    def query(self, text: str, threshold: Optional[float] = None) -> Tuple[Optional[Any], float]:
+        return self.query_signature(self.signature(text), threshold)
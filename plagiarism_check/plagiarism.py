@@ -1,94 +1,336 @@
 # plagiarism.py
 from __future__ import annotations
 import hashlib
-from typing import Dict, Optional, Tuple, List
+import json
+import os
+from typing import Dict, Iterable, Optional, Tuple, List
 import numpy as np
 from typing import Any
 
-try:
-    import faiss
-    FAISS_AVAILABLE = True
-except Exception:
-    FAISS_AVAILABLE = False
+from instrumentation.metrics import get_metrics
+from model_registry.registry import get_model, optional_import
+from plagiarism_check.minhash import MinHashLSH
 
-try:
-    from sentence_transformers import SentenceTransformer
-    ST_AVAILABLE = True
-except Exception:
-    ST_AVAILABLE = False
+# on-disk layout of a saved index directory
+META_FILE = "meta.json"
+HASHES_FILE = "hashes.jsonl"      # one [qid, post_hash] per line, replayed in order
+IDS_FILE = "ids.jsonl"            # qid of each embedding row
+EMB_FILE = "embeddings.f32"       # raw float32 rows, opened with np.memmap
+FAISS_FILE = "faiss.index"
+MINHASH_FILE = "minhash.u32"      # raw uint32 MinHash signatures
+MINHASH_IDS_FILE = "minhash_ids.jsonl"
+FLAT_FOURCCS = (b"IxFI", b"IxF2", b"IxFl")  # faiss header of IndexFlatIP / L2 / generic flat
 
 class PlagiarismChecker:
     """
     Fast semantic duplicate detection.
+    - Tiers: exact hash -> lexical MinHash/LSH (Jaccard) -> embedding similarity.
     - If FAISS + SentenceTransformer available uses them.
     - Otherwise falls back to CPU brute force using simple embeddings or text hashes.
+    - lexical_threshold=None disables the MinHash tier.
+    - faiss and the embedding model are imported/loaded on first semantic use,
+      through the process-wide model registry; semantic=False never loads them.
     """
 
-    def __init__(self, db_client: Optional[Any] = None, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, db_client: Optional[Any] = None, model_name: str = "all-MiniLM-L6-v2",
+                 lexical_threshold: Optional[float] = 0.8, semantic: bool = True):
         self.db = db_client
-        self.model = None
+        self.model_name = model_name
+        self._model = None
+        self._model_resolved = not semantic
         self.index = None
         self.id_to_hash = {}  # mapping local id -> post_hash
-        self.embeddings = []  # list of numpy arrays
+        self.hash_to_id: Dict[str, int] = {}  # reverse index for O(1) exact match
+        self._emb = np.empty((0, 0), dtype='float32')  # growable buffer of L2-normalized rows
+        self._n = 0           # rows of _emb in use
         self.ids = []         # list of question ids
-        if ST_AVAILABLE:
-            try:
-                self.model = SentenceTransformer(model_name)
-            except Exception:
-                self.model = None
+        self.path: Optional[str] = None  # bound index directory (see save/load)
+        self.lsh = MinHashLSH(threshold=lexical_threshold) if lexical_threshold is not None else None
 
-        if FAISS_AVAILABLE:
-            self.index = None  # will init on first add
+    @property
+    def model(self) -> Optional[Any]:
+        """Shared embedding model, resolved from the registry on first access."""
+        if not self._model_resolved:
+            self._model = get_model(self.model_name)
+            self._model_resolved = True
+        return self._model
+
+    @model.setter
+    def model(self, model: Optional[Any]):
+        self._model = model
+        self._model_resolved = True
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        """(n, dim) view over the stored, L2-normalized embeddings."""
+        return self._emb[:self._n]
+
+    @staticmethod
+    def _normalize(embs: np.ndarray) -> np.ndarray:
+        return embs / (np.linalg.norm(embs, axis=1, keepdims=True) + 1e-12)
 
     def _hash(self, text: str) -> str:
         return hashlib.sha256(text.strip().lower().encode()).hexdigest()
 
+    def _index_hash(self, qid: int, h: str):
+        old = self.id_to_hash.get(qid)
+        if old is not None and old != h and self.hash_to_id.get(old) == qid:
+            del self.hash_to_id[old]
+        self.id_to_hash[qid] = h
+        self.hash_to_id.setdefault(h, qid)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode a batch of texts with a single model call -> (n, dim) normalized float32."""
+        with get_metrics().timer("plagiarism.encode"):
+            embs = self.model.encode(texts, convert_to_numpy=True)
+        return self._normalize(np.atleast_2d(np.asarray(embs, dtype='float32')))
+
+    def _reserve(self, rows: int, dim: int):
+        """Grow the embedding buffer (amortized doubling) to hold `rows` rows."""
+        if self._n and self._emb.shape[1] != dim:
+            raise ValueError(f"Embedding dim {dim} does not match index dim {self._emb.shape[1]}.")
+        cap = self._emb.shape[0]
+        if rows <= cap and self._emb.shape[1] == dim:
+            return
+        new_cap = max(rows, 2 * cap, 64)
+        buf = np.empty((new_cap, dim), dtype='float32')
+        if self._n:
+            buf[:self._n] = self._emb[:self._n]
+        self._emb = buf
+
+    def _add_embeddings(self, qids: List[int], embs: np.ndarray):
+        n = embs.shape[0]
+        if self.path:
+            self._append_embeddings(qids, embs)
+        else:
+            self._reserve(self._n + n, embs.shape[1])
+            self._emb[self._n:self._n + n] = embs
+            self._n += n
+        self.ids.extend(qids)
+        faiss = optional_import("faiss")
+        # a loaded checker searches its memmap directly unless it loaded a non-flat index
+        if faiss is not None and (self.index is not None or not self.path):
+            if self.index is None:
+                self.index = faiss.IndexFlatIP(embs.shape[1])
+            self.index.add(embs)
+
     def add_question(self, qid: int, text: str):
         """Register question with id and embedding for future comparisons."""
-        h = self._hash(text)
-        self.id_to_hash[qid] = h
+        self.add_questions([(qid, text)])
+
+    def add_questions(self, items: Iterable[Tuple[int, str]]):
+        """Register many (qid, text) pairs, encoding them in one batched call."""
+        items = list(items)
+        if not items:
+            return
+        hashes = [(qid, self._hash(text)) for qid, text in items]
+        for qid, h in hashes:
+            self._index_hash(qid, h)
+        if self.path:
+            self._append_lines(HASHES_FILE, hashes)
+        if self.lsh is not None:
+            qids = [qid for qid, _ in items]
+            sigs = self.lsh.signatures_for(text for _, text in items)
+            self.lsh.add_signatures(qids, sigs)
+            if self.path:
+                with open(self._file(MINHASH_FILE), "ab") as f:
+                    f.write(sigs.tobytes())
+                self._append_lines(MINHASH_IDS_FILE, qids)
         if self.model:
-            emb = self.model.encode(text, convert_to_numpy=True)
-            emb = emb.astype('float32')
-            self.embeddings.append(emb)
-            self.ids.append(qid)
-            if FAISS_AVAILABLE:
-                dim = emb.shape[0]
-                if self.index is None:
-                    self.index = faiss.IndexFlatIP(dim)
-                    self.index.add(np.stack(self.embeddings).astype('float32'))
-                else:
-                    self.index.add(np.expand_dims(emb, axis=0))
+            embs = self._encode([text for _, text in items])
+            self._add_embeddings([qid for qid, _ in items], embs)
+        # no embedding model: store only hash
+
+    # ---- persistence ----
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _append_lines(self, name: str, values: Iterable[Any]):
+        with open(self._file(name), "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(v) + "\n" for v in values)
+
+    def _write_meta(self, dim: Optional[int]):
+        with open(self._file(META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"dim": dim, "model_name": self.model_name,
+                       "minhash": self.lsh.config() if self.lsh is not None else None}, f)
+
+    def _map_embeddings(self, dim: int, rows: int):
+        """(Re)map the first `rows` rows of the embedding file read-only."""
+        if rows:
+            self._emb = np.memmap(self._file(EMB_FILE), dtype='float32', mode='r', shape=(rows, dim))
         else:
-            # no embedding model: store only hash
-            pass
+            self._emb = np.empty((0, dim), dtype='float32')
+        self._n = rows
+
+    def _append_embeddings(self, qids: List[int], embs: np.ndarray):
+        dim = embs.shape[1]
+        if self._n and self._emb.shape[1] != dim:
+            raise ValueError(f"Embedding dim {dim} does not match index dim {self._emb.shape[1]}.")
+        if not self._n:
+            self._write_meta(dim)
+        # rows first, then ids: a torn append leaves extra rows that load() ignores
+        with open(self._file(EMB_FILE), "ab") as f:
+            f.write(np.ascontiguousarray(embs, dtype='float32').tobytes())
+        self._append_lines(IDS_FILE, qids)
+        self._map_embeddings(dim, self._n + embs.shape[0])
+
+    def save(self, path: str):
+        """
+        Write ids, hashes, embeddings (and the FAISS index when present) to `path`.
+        The checker stays bound to `path`: later adds are appended to the files
+        instead of rewriting them. Only one process should write to a directory.
+        """
+        os.makedirs(path, exist_ok=True)
+        # copy first: the current rows may be a memmap of the file being rewritten
+        emb, ids = np.array(self.embeddings, dtype='float32'), list(self.ids)
+        self.path = path
+        self._write_meta(emb.shape[1] if self._n else None)
+        with open(self._file(HASHES_FILE), "w", encoding="utf-8") as f:
+            f.writelines(json.dumps([qid, h]) + "\n" for qid, h in self.id_to_hash.items())
+        with open(self._file(IDS_FILE), "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(qid) + "\n" for qid in ids)
+        with open(self._file(EMB_FILE), "wb") as f:
+            f.write(np.ascontiguousarray(emb, dtype='float32').tobytes())
+        if self.index is not None:
+            optional_import("faiss").write_index(self.index, self._file(FAISS_FILE))
+        if self.lsh is not None:
+            with open(self._file(MINHASH_FILE), "wb") as f:
+                f.write(self.lsh.signatures.tobytes())
+            with open(self._file(MINHASH_IDS_FILE), "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(qid) + "\n" for qid in self.lsh.keys)
+        if self._n:
+            self._map_embeddings(emb.shape[1], len(ids))
+
+    def load(self, path: str):
+        """
+        Load an index written by save(). Embeddings are memory-mapped read-only,
+        so workers on one host share the page cache instead of holding copies.
+        A saved flat FAISS index is not read: it would be a private in-RAM copy of
+        the same vectors, so exact search runs on the memmapped matrix instead.
+        Other index types are opened with faiss.IO_FLAG_MMAP; rows appended after
+        such an index was written are added on load.
+        """
+        self.path = path
+        with open(self._file(META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        dim = meta.get("dim")
+
+        self.id_to_hash, self.hash_to_id = {}, {}
+        with open(self._file(HASHES_FILE), encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    qid, h = json.loads(line)
+                    self._index_hash(qid, h)
+
+        if self.lsh is not None:
+            self.lsh = MinHashLSH(threshold=self.lsh.threshold, **self.lsh.config())
+            # signatures depend on num_perm/shingle_size/seed only; banding is rebuilt on insert
+            saved = meta.get("minhash") or {}
+            same_sigs = all(saved.get(k) == self.lsh.config()[k] for k in ("num_perm", "shingle_size", "seed"))
+            if same_sigs and os.path.exists(self._file(MINHASH_FILE)):
+                with open(self._file(MINHASH_IDS_FILE), encoding="utf-8") as f:
+                    keys = [json.loads(line) for line in f if line.strip()]
+                sigs = np.fromfile(self._file(MINHASH_FILE), dtype=np.uint32).reshape(-1, self.lsh.num_perm)
+                n = min(len(keys), sigs.shape[0])
+                self.lsh.add_signatures(keys[:n], sigs[:n])
+
+        self.ids, self.index = [], None
+        self._emb, self._n = np.empty((0, 0), dtype='float32'), 0
+        if not dim:
+            return
+        with open(self._file(IDS_FILE), encoding="utf-8") as f:
+            ids = [json.loads(line) for line in f if line.strip()]
+        rows = os.path.getsize(self._file(EMB_FILE)) // (4 * dim)
+        n = min(rows, len(ids))
+        self.ids = ids[:n]
+        self._map_embeddings(dim, n)
+
+        faiss = optional_import("faiss")
+        if faiss is not None and os.path.exists(self._file(FAISS_FILE)):
+            with open(self._file(FAISS_FILE), "rb") as f:
+                flat = f.read(4) in FLAT_FOURCCS
+            if not flat:
+                self.index = faiss.read_index(self._file(FAISS_FILE), faiss.IO_FLAG_MMAP)
+                if self.index.ntotal > n:
+                    self.index = None
+                elif self.index.ntotal < n:
+                    self.index.add(np.ascontiguousarray(self._emb[self.index.ntotal:n]))
+
+    def _search(self, embs: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k cosine search for normalized query rows.
+        Returns (D, I) shaped (n_queries, k), best first, like faiss.Index.search.
+        """
+        k = min(k, self._n)
+        if self.index is not None:
+            with get_metrics().timer("plagiarism.faiss_search"):
+                return self.index.search(embs, k)
+        # brute-force CPU: one matrix product, argpartition for top-k
+        with get_metrics().timer("plagiarism.bruteforce_search"):
+            sims = embs @ self.embeddings.T  # (n_queries, n)
+        if k < self._n:
+            part = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        else:
+            part = np.broadcast_to(np.arange(self._n), (sims.shape[0], self._n))
+        top = np.take_along_axis(sims, part, axis=1)
+        order = np.argsort(-top, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(part, order, axis=1)
+
+    def _semantic_matches(self, embs: np.ndarray, threshold: float) -> List[Optional[int]]:
+        """Return the best matching qid (or None) for each row of `embs`."""
+        D, I = self._search(embs, 5)
+        out = []
+        for sims, idxs in zip(D, I):
+            match = None
+            for sim, idx in zip(sims, idxs):
+                if idx >= 0 and sim >= threshold:
+                    match = self.ids[idx]
+                    break
+            out.append(match)
+        return out
+
+    def check_many(self, texts: Iterable[str], threshold: float = 0.85) -> List[Tuple[bool, Optional[int]]]:
+        """
+        Batched is_plagiarized: exact hits are resolved from the hash index,
+        then the MinHash tier; the remaining texts share one encode call and
+        one index search.
+        """
+        metrics = get_metrics()
+        texts = list(texts)
+        results: List[Tuple[bool, Optional[int]]] = [(False, None)] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            qid = self.hash_to_id.get(self._hash(text))
+            if qid is not None:
+                results[i] = (True, qid)
+            else:
+                pending.append(i)
+        metrics.incr("plagiarism.checks", len(texts))
+        metrics.incr("plagiarism.exact_hits", len(texts) - len(pending))
+
+        if pending and self.lsh is not None and len(self.lsh):
+            still = []
+            for i in pending:
+                qid, _ = self.lsh.query(texts[i])
+                if qid is not None:
+                    results[i] = (True, qid)
+                else:
+                    still.append(i)
+            metrics.incr("plagiarism.lexical_hits", len(pending) - len(still))
+            pending = still
+
+        if pending and self._n and self.model:  # empty index: never load the model
+            embs = self._encode([texts[i] for i in pending])
+            hits = 0
+            for i, qid in zip(pending, self._semantic_matches(embs, threshold)):
+                if qid is not None:
+                    results[i] = (True, qid)
+                    hits += 1
+            metrics.incr("plagiarism.semantic_checks", len(pending))
+            metrics.incr("plagiarism.semantic_hits", hits)
+        return results
 
     def is_plagiarized(self, new_text: str, threshold: float = 0.85) -> Tuple[bool, Optional[int]]:
         """Returns (is_plagiarized, similar_qid)"""
-        new_hash = self._hash(new_text)
-        # Exact match quick check
-        for qid, h in self.id_to_hash.items():
-            if h == new_hash:
-                return True, qid
-
-        # Embedding similarity check
-        if self.model and (FAISS_AVAILABLE and self.index is not None or self.embeddings):
-            new_emb = self.model.encode(new_text, convert_to_numpy=True).astype('float32')
-            if FAISS_AVAILABLE and self.index is not None:
-                k = min(5, len(self.ids))
-                D, I = self.index.search(np.expand_dims(new_emb, axis=0), k)
-                sims = D[0]
-                idxs = I[0]
-                for sim, idx in zip(sims, idxs):
-                    if sim >= threshold:
-                        return True, self.ids[idx]
-            else:
-                # brute-force CPU
-                norms = np.linalg.norm(np.stack(self.embeddings), axis=1) * (np.linalg.norm(new_emb) + 1e-12)
-                dots = np.dot(np.stack(self.embeddings), new_emb)
-                sims = dots / norms
-                best_idx = int(np.argmax(sims))
-                if sims[best_idx] >= threshold:
-                    return True, self.ids[best_idx]
-
-        return False, None
+        return self.check_many([new_text], threshold)[0]
@@ -1,8 +1,9 @@
 # scoring_engine.py
 from __future__ import annotations
-from typing import Dict
-from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple, Union
+from datetime import date, datetime, timedelta
 import math
+import numpy as np
 
 def compute_proficiency(topic_data: Dict[str, Dict]) -> Dict[str, float]:
     """
@@ -42,3 +43,109 @@ def compute_proficiency(topic_data: Dict[str, Dict]) -> Dict[str, float]:
         score = max(0.0, min(1.0, raw))
         out[topic] = round(score * 100, 2)
     return out
+
+
+EPOCH = date(1970, 1, 1)
+
+def epoch_day(d: Optional[Union[date, datetime, str]] = None) -> int:
+    """Days since 1970-01-01 for a date, datetime or ISO string (default: today)."""
+    if d is None:
+        d = date.today()
+    elif isinstance(d, str):
+        d = datetime.fromisoformat(d)
+    if isinstance(d, datetime):
+        d = d.date()
+    return (d - EPOCH).days
+
+def compute_proficiency_arrays(
+    correct: np.ndarray,
+    total: np.ndarray,
+    avg_time: np.ndarray,
+    last_day: np.ndarray,
+    today: Optional[int] = None
+) -> np.ndarray:
+    """
+    Columnar compute_proficiency for any number of learners x topics.
+    Inputs are same-shape arrays; last_day holds epoch days (NaN = attempted today).
+    Returns 0-100 scores rounded to 2 decimals.
+    """
+    today = epoch_day() if today is None else today
+    correct = np.asarray(correct, dtype=np.float64)
+    total = np.asarray(total, dtype=np.float64)
+    avg_time = np.nan_to_num(np.asarray(avg_time, dtype=np.float64))
+    last_day = np.asarray(last_day, dtype=np.float64)
+
+    # Bayesian prior: Beta(2,2) -> 0.5 baseline
+    mean = (2 + correct) / (4 + total)
+    time_pen = 1.0 / (1.0 + np.log1p(avg_time / 60.0))
+    days = np.maximum(0, today - np.where(np.isnan(last_day), today, last_day))
+    decay = 0.5 ** (days / 30.0)
+
+    raw = mean * 0.7 + time_pen * 0.2 + decay * 0.1
+    return np.round(np.clip(raw, 0.0, 1.0) * 100, 2)
+
+
+class ProficiencyTracker:
+    """
+    Incremental proficiency: keeps sufficient statistics (correct, total,
+    running avg_time, last epoch day) per (learner, topic) in columns and
+    folds each new attempt in O(1). Scores are computed on demand, for one
+    pair or for everything at once.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.rows: Dict[Tuple[Any, str], int] = {}
+        self.keys: List[Tuple[Any, str]] = []
+        self.learner_rows: Dict[Any, List[int]] = {}
+        self.correct = np.zeros(capacity, dtype=np.int64)
+        self.total = np.zeros(capacity, dtype=np.int64)
+        self.avg_time = np.zeros(capacity, dtype=np.float64)
+        self.last_day = np.full(capacity, np.nan, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _row(self, learner: Any, topic: str) -> int:
+        key = (learner, topic)
+        row = self.rows.get(key)
+        if row is None:
+            row = self.rows[key] = len(self.keys)
+            self.keys.append(key)
+            self.learner_rows.setdefault(learner, []).append(row)
+            if row >= self.total.shape[0]:
+                grow = self.total.shape[0]
+                self.correct = np.concatenate([self.correct, np.zeros(grow, dtype=np.int64)])
+                self.total = np.concatenate([self.total, np.zeros(grow, dtype=np.int64)])
+                self.avg_time = np.concatenate([self.avg_time, np.zeros(grow, dtype=np.float64)])
+                self.last_day = np.concatenate([self.last_day, np.full(grow, np.nan)])
+        return row
+
+    def record(self, learner: Any, topic: str, correct: bool, time_s: float, day: Optional[int] = None):
+        """Fold one attempt into the stored statistics."""
+        row = self._row(learner, topic)
+        day = epoch_day() if day is None else day
+        self.total[row] += 1
+        self.correct[row] += 1 if correct else 0
+        self.avg_time[row] += (time_s - self.avg_time[row]) / self.total[row]
+        last = self.last_day[row]
+        self.last_day[row] = day if np.isnan(last) else max(last, day)
+
+    def score(self, learner: Any, topic: str, today: Optional[int] = None) -> Optional[float]:
+        row = self.rows.get((learner, topic))
+        if row is None:
+            return None
+        return float(compute_proficiency_arrays(
+            self.correct[row], self.total[row], self.avg_time[row], self.last_day[row], today))
+
+    def scores(self, today: Optional[int] = None) -> np.ndarray:
+        """Scores for every (learner, topic) row, aligned with `keys`."""
+        n = len(self.keys)
+        return compute_proficiency_arrays(
+            self.correct[:n], self.total[:n], self.avg_time[:n], self.last_day[:n], today)
+
+    def learner_scores(self, learner: Any, today: Optional[int] = None) -> Dict[str, float]:
+        """compute_proficiency-style {topic: score} for one learner."""
+        rows = self.learner_rows.get(learner, [])
+        vals = compute_proficiency_arrays(
+            self.correct[rows], self.total[rows], self.avg_time[rows], self.last_day[rows], today)
+        return {self.keys[r][1]: float(v) for r, v in zip(rows, vals)}
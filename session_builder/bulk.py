@@ -0,0 +1,99 @@
+# bulk.py
+from __future__ import annotations
+import hashlib
+import multiprocessing
+import os
+import random
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from session_builder.session_builder import InsufficientQuestionsError, QuestionPool, build_session
+
+# (learner_id, weak_ids, review_ids, new_ids)
+LearnerPools = Tuple[Any, Sequence[Any], Sequence[Any], Sequence[Any]]
+
+_WORKER_POOL: Optional[QuestionPool] = None
+_WORKER_OPTS: Dict[str, Any] = {}
+
+
+def learner_rng(seed: int, learner_id: Any) -> random.Random:
+    """Per-learner generator: same (seed, learner_id) -> same session, on any worker."""
+    digest = hashlib.sha256(f"{seed}:{learner_id!r}".encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def _init_worker(pool: QuestionPool, opts: Dict[str, Any]):
+    # with the fork start method the pool is inherited copy-on-write, not pickled
+    global _WORKER_POOL, _WORKER_OPTS
+    _WORKER_POOL, _WORKER_OPTS = pool, opts
+
+
+def _build_chunk(chunk: List[LearnerPools]) -> List[Tuple[Any, Optional[List[Any]]]]:
+    opts = dict(_WORKER_OPTS)
+    seed = opts.pop("seed")
+    out = []
+    for learner_id, weak, review, new in chunk:
+        try:
+            session = build_session(list(weak), list(review), list(new), all_questions_pool=_WORKER_POOL,
+                                    rng=learner_rng(seed, learner_id), **opts)
+            out.append((learner_id, [q["id"] for q in session]))
+        except InsufficientQuestionsError:
+            out.append((learner_id, None))
+    return out
+
+
+def _chunks(items: Iterable[LearnerPools], size: int) -> Iterator[List[LearnerPools]]:
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def build_sessions_bulk(
+    learners: Iterable[LearnerPools],
+    pool: QuestionPool,
+    seed: int = 0,
+    processes: Optional[int] = None,
+    chunksize: int = 256,
+    week_filter: Optional[List[int]] = None,
+    total: int = 10,
+    ratios: Optional[Dict[str, float]] = None,
+    min_viable: int = 3
+) -> Iterator[Tuple[Any, Optional[List[Any]]]]:
+    """
+    Build sessions for many learners, yielding (learner_id, session_ids) as
+    chunks finish (completion order). session_ids is None when the learner
+    has too few questions.
+    - Deterministic: each learner gets learner_rng(seed, learner_id).
+    - Learners are sharded in `chunksize` chunks across `processes` workers
+      (default os.cpu_count(); 1 runs inline). The pool is shared read-only.
+    - At most 2 chunks per worker are in flight, so neither input nor
+      results are held in memory all at once.
+    """
+    opts = {"seed": seed, "week_filter": week_filter, "total": total, "ratios": ratios, "min_viable": min_viable}
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        _init_worker(pool, opts)
+        for chunk in _chunks(learners, chunksize):
+            yield from _build_chunk(chunk)
+        return
+
+    methods = multiprocessing.get_all_start_methods()
+    ctx = multiprocessing.get_context("fork" if "fork" in methods else None)
+    max_in_flight = 2 * processes
+    with ProcessPoolExecutor(max_workers=processes, mp_context=ctx,
+                             initializer=_init_worker, initargs=(pool, opts)) as ex:
+        pending = set()
+        for chunk in _chunks(learners, chunksize):
+            pending.add(ex.submit(_build_chunk, chunk))
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    yield from fut.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield from fut.result()
@@ -1,7 +1,7 @@
 # session_builder.py
 from __future__ import annotations
 import random
-from typing import List, Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 class InsufficientQuestionsError(RuntimeError):
     pass
@@ -17,67 +17,165 @@ def _unique_by_id(pool: List[Dict]) -> List[Dict]:
         out.append(q)
     return out
 
+
+class QuestionPool:
+    """
+    Question bank deduplicated once and indexed by id, week, topic and difficulty.
+    Build it once and pass it as `all_questions_pool`; lookups return integer
+    positions into `questions`.
+    """
+
+    def __init__(self, questions: Iterable[Dict]):
+        self.questions: List[Dict] = []
+        self.pos_by_id: Dict[Any, int] = {}
+        self.by_week: Dict[Any, List[int]] = {}
+        self.by_topic: Dict[Any, List[int]] = {}
+        self.by_difficulty: Dict[Any, List[int]] = {}
+        self._filtered: Dict[Tuple, List[int]] = {}
+        for q in questions:
+            qid = q.get("id")
+            if qid in self.pos_by_id:
+                continue
+            pos = len(self.questions)
+            self.questions.append(q)
+            self.pos_by_id[qid] = pos
+            self.by_week.setdefault(q.get("week"), []).append(pos)
+            self.by_topic.setdefault(q.get("topic"), []).append(pos)
+            self.by_difficulty.setdefault(q.get("difficulty"), []).append(pos)
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def __contains__(self, qid: Any) -> bool:
+        return qid in self.pos_by_id
+
+    def get(self, qid: Any) -> Optional[Dict]:
+        pos = self.pos_by_id.get(qid)
+        return None if pos is None else self.questions[pos]
+
+    def positions(self, weeks: Optional[Iterable[Any]] = None, topics: Optional[Iterable[Any]] = None,
+                  difficulties: Optional[Iterable[Any]] = None) -> List[int]:
+        """Sorted positions matching every given filter (None = no filter). Results are cached."""
+        key = tuple(None if f is None else tuple(sorted(set(f), key=repr)) for f in (weeks, topics, difficulties))
+        cached = self._filtered.get(key)
+        if cached is not None:
+            return cached
+        result: Optional[set] = None
+        for values, index in zip(key, (self.by_week, self.by_topic, self.by_difficulty)):
+            if values is None:
+                continue
+            match = {p for v in values for p in index.get(v, ())}
+            result = match if result is None else result & match
+        out = list(range(len(self.questions))) if result is None else sorted(result)
+        self._filtered[key] = out
+        return out
+
+    def sample(self, positions: List[int], n: int, exclude_ids: Optional[set] = None,
+               rng: Optional[Any] = None) -> List[Dict]:
+        """Up to n random questions from `positions`, skipping ids in exclude_ids."""
+        rng = rng or random
+        exclude_ids = exclude_ids or set()
+        draw = rng.sample(positions, min(len(positions), n + len(exclude_ids)))
+        out = []
+        for pos in draw:
+            q = self.questions[pos]
+            if q.get("id") not in exclude_ids:
+                out.append(q)
+                if len(out) == n:
+                    break
+        return out
+
+
+def _prepare(items: List[Any], pool: Optional[QuestionPool], weeks: Optional[set]) -> List[Dict]:
+    """Resolve ids through the pool, apply the week filter, drop duplicates (small per-learner lists)."""
+    out = []
+    for q in items:
+        if not isinstance(q, dict):
+            q = pool.get(q) if pool is not None else None
+            if q is None:
+                continue
+        if weeks is not None and q.get("week") not in weeks:
+            continue
+        out.append(q)
+    return _unique_by_id(out)
+
 def build_session(
-    weak: List[Dict],
-    review: List[Dict],
-    new: List[Dict],
+    weak: List[Union[Dict, Any]],
+    review: List[Union[Dict, Any]],
+    new: List[Union[Dict, Any]],
     week_filter: Optional[List[int]] = None,
-    all_questions_pool: Optional[List[Dict]] = None,
+    all_questions_pool: Optional[Union[QuestionPool, List[Dict]]] = None,
     total: int = 10,
     ratios: Optional[Dict[str, float]] = None,
-    min_viable: int = 3
+    min_viable: int = 3,
+    rng: Optional[random.Random] = None
 ) -> List[Dict]:
     """
     Build a session with given pools.
     - ratios default: 60% weak, 30% review, 10% new
-    - Backfill from all_questions_pool when pools insufficient.
+    - weak/review/new may hold question dicts or ids resolved through the pool.
+    - week_filter keeps only questions whose "week" is listed.
+    - Backfill from all_questions_pool when pools insufficient, then from any
+      unused weak/review/new items. Pass a prebuilt QuestionPool; a plain list
+      is indexed on every call.
+    - rng: random.Random for reproducible sessions (default: module random).
     """
+    rng = rng or random
     ratios = ratios or {"weak": 0.6, "review": 0.3, "new": 0.1}
-    weak = _unique_by_id(weak)
-    review = _unique_by_id(review)
-    new = _unique_by_id(new)
-    all_pool = _unique_by_id(all_questions_pool or (weak + review + new))
+    pool = all_questions_pool
+    if pool is not None and not isinstance(pool, QuestionPool):
+        pool = QuestionPool(pool)
+    if pool is not None and not len(pool):
+        pool = None  # empty bank: fall back to weak + review + new, as before
+    weeks = set(week_filter) if week_filter else None
+    weak = _prepare(weak, pool, weeks)
+    review = _prepare(review, pool, weeks)
+    new = _prepare(new, pool, weeks)
 
-    if len(all_pool) < min_viable:
+    if pool is not None:
+        candidates = pool.positions(weeks=weeks)
+        available = len(candidates)
+    else:
+        fallback = _unique_by_id(weak + review + new)
+        available = len(fallback)
+    if available < min_viable:
         raise InsufficientQuestionsError("Not enough questions available.")
 
     want_weak = int(total * ratios["weak"])
     want_review = int(total * ratios["review"])
     want_new = total - (want_weak + want_review)
 
-    session = []
-    def take(pool, n):
-        if not pool or n <= 0:
-            return []
-        return random.sample(pool, min(n, len(pool)))
+    session: List[Dict] = []
+    seen = set()
+    def take(lst, n):
+        if not lst or n <= 0:
+            return
+        for q in rng.sample(lst, min(n, len(lst))):
+            if q["id"] not in seen:
+                seen.add(q["id"])
+                session.append(q)
 
-    session += take(weak, want_weak)
-    session += take(review, want_review)
-    session += take(new, want_new)
+    take(weak, want_weak)
+    take(review, want_review)
+    take(new, want_new)
 
     # backfill
-    if len(session) < total:
-        existing_ids = {q["id"] for q in session}
-        candidates = [q for q in all_pool if q["id"] not in existing_ids]
-        need = total - len(session)
-        if not candidates:
-            # nothing new; allow sampling from session (shouldn't happen)
-            pass
+    need = total - len(session)
+    if need > 0:
+        if pool is not None:
+            extra = pool.sample(candidates, need, exclude_ids=seen, rng=rng)
         else:
-            session += random.sample(candidates, min(need, len(candidates)))
-
-    # final safety
-    session = _unique_by_id(session)
-    if len(session) < total:
-        # permissive backfill allowing duplicates only if unavoidable
-        extra = (weak + review + new + all_pool)
-        i = 0
-        while len(session) < total and i < len(extra):
-            cand = extra[i % len(extra)]
-            if cand["id"] not in {q["id"] for q in session}:
-                session.append(cand)
-            i += 1
+            rest = [q for q in fallback if q["id"] not in seen]
+            extra = rng.sample(rest, min(need, len(rest)))
+        for q in extra:
+            seen.add(q["id"])
+            session.append(q)
+
+    # pool exhausted: unused weak/review/new items may still lie outside it
+    need = total - len(session)
+    if need > 0 and pool is not None:
+        take(_unique_by_id([q for q in weak + review + new if q["id"] not in seen]), need)
 
     # final shuffle and trim
-    random.shuffle(session)
+    rng.shuffle(session)
     return session[:total]
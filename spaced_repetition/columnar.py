@@ -0,0 +1,214 @@
+# columnar.py
+from __future__ import annotations
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Union
+import numpy as np
+
+from spaced_repetition.repetition_scheduler import MAX_INTERVAL
+
+Day = Union[date, int]
+
+
+def _day(d: Optional[Day]) -> int:
+    if d is None:
+        return date.today().toordinal()
+    return d if isinstance(d, int) else d.toordinal()
+
+
+class ColumnarScheduler:
+    """
+    Struct-of-arrays spaced repetition state for many learners at once.
+    - user ids and qids are interned to int32 codes
+    - last_seen / next_due are int32 day ordinals (date.toordinal())
+    - ease_factor is float64 and interval int64, so the arithmetic is
+      bit-identical to the Python floats/ints of the reference scheduler
+    Cards are located through a sorted int64 key (user_code << 32 | qid_code),
+    which also keeps each learner's cards contiguous. New cards go to an
+    unsorted tail (rows >= _merged, found through a dict) that is merged into
+    the sorted index once it outgrows ~16*sqrt(cards), so adding N cards costs
+    O(N sqrt N) copying in total instead of O(N^2).
+    Update rules are the same as SpacedRepetitionScheduler.update_review,
+    including the MAX_INTERVAL cap.
+    """
+
+    def __init__(self, capacity: int = 1024, base: int = 1):
+        self.base = base
+        self.user_codes: Dict[Any, int] = {}
+        self.users: List[Any] = []
+        self.qid_codes: Dict[str, int] = {}
+        self.qids: List[str] = []
+        self._n = 0
+        self.user = np.empty(capacity, dtype=np.int32)
+        self.qid = np.empty(capacity, dtype=np.int32)
+        self.last_seen = np.empty(capacity, dtype=np.int32)
+        self.next_due = np.empty(capacity, dtype=np.int32)
+        self.ease_factor = np.empty(capacity, dtype=np.float64)
+        self.interval = np.empty(capacity, dtype=np.int64)
+        self._keys = np.empty(0, dtype=np.int64)   # sorted card keys
+        self._order = np.empty(0, dtype=np.int64)  # row of each sorted key
+        self._merged = 0                            # rows below this are in _keys
+        self._tail: Dict[int, int] = {}             # key -> row for rows >= _merged
+
+    def __len__(self) -> int:
+        return self._n
+
+    # ---- interning / row lookup ----
+
+    @staticmethod
+    def _intern(values: Iterable[Any], codes: Dict[Any, int], table: List[Any]) -> np.ndarray:
+        out = []
+        for v in values:
+            c = codes.get(v)
+            if c is None:
+                c = codes[v] = len(table)
+                table.append(v)
+            out.append(c)
+        return np.array(out, dtype=np.int64)
+
+    def _grow(self, rows: int):
+        cap = self.user.shape[0]
+        if rows <= cap:
+            return
+        new_cap = max(rows, 2 * cap)
+        for name in ("user", "qid", "last_seen", "next_due", "ease_factor", "interval"):
+            col = getattr(self, name)
+            buf = np.empty(new_cap, dtype=col.dtype)
+            buf[:self._n] = col[:self._n]
+            setattr(self, name, buf)
+
+    def _rows(self, u: np.ndarray, q: np.ndarray, today: int) -> np.ndarray:
+        """Rows for (user, qid) codes, creating unseen cards as add_question would."""
+        keys = (u << 32) | q
+        pos = np.searchsorted(self._keys, keys)
+        found = pos < self._keys.size
+        found[found] = self._keys[pos[found]] == keys[found]
+        rows = np.empty(keys.size, dtype=np.int64)
+        rows[found] = self._order[pos[found]]
+        if found.all():
+            return rows
+        miss = np.flatnonzero(~found)
+        tail = np.array([self._tail.get(k, -1) for k in keys[miss].tolist()], dtype=np.int64)
+        rows[miss] = tail
+        miss = miss[tail < 0]
+        if miss.size:
+            new_keys, inverse = np.unique(keys[miss], return_inverse=True)
+            start = self._n
+            new_rows = np.arange(start, start + new_keys.size)
+            self._grow(start + new_keys.size)
+            self._n += new_keys.size
+            self.user[new_rows] = new_keys >> 32
+            self.qid[new_rows] = new_keys & 0xFFFFFFFF
+            self._reset(new_rows, today)
+            self._tail.update(zip(new_keys.tolist(), new_rows.tolist()))
+            rows[miss] = new_rows[inverse.ravel()]
+            if len(self._tail) > max(4096, 16 * int(np.sqrt(self._n))):
+                self._merge_tail()
+        return rows
+
+    def _merge_tail(self):
+        """Fold the tail rows into the sorted index (one O(cards) insert)."""
+        tail_rows = np.arange(self._merged, self._n)
+        tail_keys = (self.user[self._merged:self._n].astype(np.int64) << 32) | self.qid[self._merged:self._n]
+        order = np.argsort(tail_keys)
+        ins = np.searchsorted(self._keys, tail_keys[order])
+        self._keys = np.insert(self._keys, ins, tail_keys[order])
+        self._order = np.insert(self._order, ins, tail_rows[order])
+        self._merged = self._n
+        self._tail.clear()
+
+    def _reset(self, rows: np.ndarray, today: int):
+        self.last_seen[rows] = today
+        self.interval[rows] = self.base
+        self.ease_factor[rows] = 2.5
+        self.next_due[rows] = today + self.base
+
+    # ---- bulk API ----
+
+    def add_questions(self, user_ids: Iterable[Any], qids: Iterable[str], today: Optional[Day] = None):
+        """Add (or reset) cards in bulk."""
+        day = _day(today)
+        u = self._intern(user_ids, self.user_codes, self.users)
+        q = self._intern(qids, self.qid_codes, self.qids)
+        self._reset(self._rows(u, q, day), day)
+
+    def update_reviews(self, user_ids: Iterable[Any], qids: Iterable[str], correct: Iterable[bool],
+                       today: Optional[Day] = None):
+        """
+        Vectorized update_review. Repeated cards within one batch are applied
+        in order, one vectorized round per repetition.
+        """
+        day = _day(today)
+        u = self._intern(user_ids, self.user_codes, self.users)
+        q = self._intern(qids, self.qid_codes, self.qids)
+        ok = np.asarray(list(correct) if not isinstance(correct, np.ndarray) else correct, dtype=bool)
+        rows = self._rows(u, q, day)
+
+        # occurrence rank of each row within the batch (0 for first review, 1 for second, ...)
+        order = np.argsort(rows, kind="stable")
+        sorted_rows = rows[order]
+        starts = np.r_[0, np.flatnonzero(np.diff(sorted_rows)) + 1]
+        group_start = np.repeat(starts, np.diff(np.r_[starts, sorted_rows.size]))
+        rank = np.empty(rows.size, dtype=np.int64)
+        rank[order] = np.arange(rows.size) - group_start
+
+        for r in range(int(rank.max()) + 1 if rank.size else 0):
+            sel = rank == r
+            self._apply(rows[sel], ok[sel], day)
+
+    def _apply(self, rows: np.ndarray, ok: np.ndarray, day: int):
+        ease = self.ease_factor[rows]
+        interval = self.interval[rows]
+        ease = np.where(ok, np.minimum(3.0, ease + 0.1), np.maximum(1.3, ease - 0.25))
+        grown = np.clip(np.floor(interval * ease).astype(np.int64), 1, MAX_INTERVAL)
+        interval = np.where(ok, grown, 1)
+        self.ease_factor[rows] = ease
+        self.interval[rows] = interval
+        self.last_seen[rows] = day
+        self.next_due[rows] = day + interval
+
+    def update_review(self, user_id: Any, qid: str, correct: bool, today: Optional[Day] = None):
+        self.update_reviews([user_id], [qid], [correct], today)
+
+    def add_history(self, user_id: Any, history: Dict[str, Dict]):
+        """Import a SpacedRepetitionScheduler.history dict for one learner."""
+        qids = list(history)
+        if not qids:
+            return
+        u = self._intern([user_id] * len(qids), self.user_codes, self.users)
+        rows = self._rows(u, self._intern(qids, self.qid_codes, self.qids), date.today().toordinal())
+        metas = [history[qid] for qid in qids]
+        self.last_seen[rows] = [m["last_seen"].toordinal() for m in metas]
+        self.next_due[rows] = [m["next_due"].toordinal() for m in metas]
+        self.ease_factor[rows] = [m["ease_factor"] for m in metas]
+        self.interval[rows] = [m["interval"] for m in metas]
+
+    # ---- queries ----
+
+    def _user_rows(self, user_id: Any) -> np.ndarray:
+        code = self.user_codes.get(user_id)
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        lo, hi = np.searchsorted(self._keys, [code << 32, (code + 1) << 32])
+        tail = self._merged + np.flatnonzero(self.user[self._merged:self._n] == code)
+        return np.sort(np.concatenate([self._order[lo:hi], tail]))  # creation order
+
+    def get_due_today(self, user_id: Any, today: Optional[Day] = None, limit: Optional[int] = None) -> List[str]:
+        """Due qids for one learner, most overdue first."""
+        rows = self._user_rows(user_id)
+        rows = rows[self.next_due[rows] <= _day(today)]
+        rows = rows[np.argsort(self.next_due[rows], kind="stable")]
+        if limit:
+            rows = rows[:limit]
+        return [self.qids[c] for c in self.qid[rows]]
+
+    def forecast_load(self, days: int, today: Optional[Day] = None) -> np.ndarray:
+        """
+        Projected due reviews per learner per day, shape (len(users), days).
+        Column 0 is today and includes overdue cards; rows follow `self.users`.
+        Assumes no reviews happen in between (pure due-date histogram), one pass.
+        """
+        n_users = len(self.users)
+        offset = self.next_due[:self._n].astype(np.int64) - _day(today)
+        keep = offset < days
+        cell = self.user[:self._n][keep].astype(np.int64) * days + np.maximum(offset[keep], 0)
+        return np.bincount(cell, minlength=n_users * days).reshape(n_users, days)
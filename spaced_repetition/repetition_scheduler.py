@@ -1,55 +1,232 @@
 # repetition_scheduler.py
 from __future__ import annotations
 from datetime import date, timedelta
-from typing import Dict, Optional, List, Any
+from typing import Dict, Iterable, Optional, List, Any, Tuple
+import bisect
 import math
+import sqlite3
+import time
+import weakref
+
+# longest review interval in days (100 years); keeps next_due a valid date however long a streak runs
+MAX_INTERVAL = 36500
+
+
+class ReviewScheduleStore:
+    """
+    Batched access to the `review_schedule` table:
+      (user_id, qid, last_seen, interval, ease_factor, next_due), primary key (user_id, qid).
+    Works with a DB-API connection using %s params (psycopg) or a sqlite3 connection.
+    """
+
+    COLUMNS = ("last_seen", "interval", "ease_factor", "next_due")
+
+    def __init__(self, db_client: Any):
+        self.db = db_client
+        self.ph = "?" if isinstance(db_client, sqlite3.Connection) else "%s"
+
+    def ensure_schema(self):
+        cur = self.db.cursor()
+        cur.execute(
+            "CREATE TABLE IF NOT EXISTS review_schedule ("
+            " user_id INTEGER NOT NULL, qid TEXT NOT NULL, last_seen DATE NOT NULL,"
+            " interval INTEGER NOT NULL, ease_factor REAL NOT NULL, next_due DATE NOT NULL,"
+            " PRIMARY KEY (user_id, qid))"
+        )
+        self.db.commit()
+
+    @staticmethod
+    def _as_date(v: Any) -> date:
+        return v if isinstance(v, date) else date.fromisoformat(str(v))
+
+    def load(self, user_id: int) -> Dict[str, Dict]:
+        cur = self.db.cursor()
+        cur.execute(
+            f"SELECT qid, last_seen, interval, ease_factor, next_due FROM review_schedule WHERE user_id = {self.ph}",
+            (user_id,)
+        )
+        return {
+            qid: {
+                "last_seen": self._as_date(last_seen),
+                "interval": int(interval),
+                "ease_factor": float(ease_factor),
+                "next_due": self._as_date(next_due)
+            }
+            for qid, last_seen, interval, ease_factor, next_due in cur.fetchall()
+        }
+
+    def upsert_many(self, user_id: int, rows: Iterable[Tuple[str, Dict]]):
+        """One executemany + commit for the whole batch."""
+        params = [
+            (user_id, qid, m["last_seen"].isoformat(), m["interval"], m["ease_factor"], m["next_due"].isoformat())
+            for qid, m in rows
+        ]
+        if not params:
+            return
+        ph = ", ".join([self.ph] * 6)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in self.COLUMNS)
+        cur = self.db.cursor()
+        cur.executemany(
+            f"INSERT INTO review_schedule (user_id, qid, last_seen, interval, ease_factor, next_due)"
+            f" VALUES ({ph}) ON CONFLICT (user_id, qid) DO UPDATE SET {updates}",
+            params
+        )
+        self.db.commit()
+
+
+def _write_dirty(store: ReviewScheduleStore, user_id: int, history: Dict[str, Dict], dirty: Dict[str, None]) -> int:
+    """Upsert the dirty rows in one batch and clear them. Returns rows written (0 if the write failed)."""
+    if not dirty:
+        return 0
+    qids = list(dirty)
+    try:
+        store.upsert_many(user_id, ((qid, history[qid]) for qid in qids))
+    except Exception:
+        try:
+            store.db.rollback()
+        except Exception:
+            pass
+        return 0  # rows stay dirty for the next flush
+    for qid in qids:
+        dirty.pop(qid, None)
+    return len(qids)
+
 
 class SpacedRepetitionScheduler:
     """
     Parametric spaced repetition.
     Use persistence layer (db) through optional db_client with expected table `review_schedule`.
     In-memory fallback provided for testing.
+    Due dates are indexed in day buckets so get_due_today costs O(due), not O(cards).
+    With a db_client and user_id, the user's rows are loaded on first use and
+    changes are written behind: dirty rows are upserted in one batch once
+    `flush_size` rows are pending or `flush_interval` seconds have passed,
+    and on flush()/close() (or leaving a `with` block).
+    The interval is only checked when a write arrives: a long-lived process that
+    goes idle should call flush() itself. Pending rows are also flushed when
+    the scheduler is garbage-collected or the interpreter exits.
     """
 
-    def __init__(self, db_client: Optional[Any] = None, user_id: Optional[int] = None):
+    def __init__(self, db_client: Optional[Any] = None, user_id: Optional[int] = None,
+                 flush_size: int = 100, flush_interval: float = 5.0):
         self.db = db_client
         self.user_id = user_id
         self.history: Dict[str, Dict] = {}  # qid -> {last_seen, interval, ease_factor, next_due}
         self.base = 1
+        self.store = ReviewScheduleStore(db_client) if db_client is not None and user_id is not None else None
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._loaded = self.store is None
+        self._dirty: Dict[str, None] = {}
+        self._last_flush = time.monotonic()
+        self._due_days: List[int] = []  # sorted ordinals that have a bucket
+        self._due_buckets: Dict[int, Dict[str, None]] = {}  # ordinal -> ordered set of qids
+        if self.store is not None:
+            # references the row dicts, not self, so it can run after self is collected
+            weakref.finalize(self, _write_dirty, self.store, user_id, self.history, self._dirty)
+
+    def _index_due(self, qid: str, due: date):
+        day = due.toordinal()
+        bucket = self._due_buckets.get(day)
+        if bucket is None:
+            bucket = self._due_buckets[day] = {}
+            bisect.insort(self._due_days, day)
+        bucket[qid] = None
+
+    def _unindex_due(self, qid: str):
+        meta = self.history.get(qid)
+        if meta is None:
+            return
+        day = meta["next_due"].toordinal()
+        bucket = self._due_buckets.get(day)
+        if bucket is None:
+            return
+        bucket.pop(qid, None)
+        if not bucket:
+            del self._due_buckets[day]
+            del self._due_days[bisect.bisect_left(self._due_days, day)]
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        rows = self.store.load(self.user_id)  # on error stay unloaded, so nothing overwrites stored rows
+        self._loaded = True
+        for qid, meta in rows.items():
+            if qid not in self.history:
+                self.history[qid] = meta
+                self._index_due(qid, meta["next_due"])
+
+    def _mark_dirty(self, qid: str):
+        if self.store is None:
+            return
+        self._dirty[qid] = None
+        if len(self._dirty) >= self.flush_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> int:
+        """Upsert all dirty rows in one batch. Returns rows written (0 if the write failed)."""
+        self._last_flush = time.monotonic()
+        if self.store is None:
+            return 0
+        return _write_dirty(self.store, self.user_id, self.history, self._dirty)
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self) -> "SpacedRepetitionScheduler":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
     def add_question(self, qid: str, today: Optional[date] = None):
+        self._ensure_loaded()
         d = today or date.today()
+        self._unindex_due(qid)
         self.history[qid] = {
             "last_seen": d,
             "interval": self.base,
             "ease_factor": 2.5,
             "next_due": d + timedelta(days=self.base)
         }
+        self._index_due(qid, self.history[qid]["next_due"])
+        self._mark_dirty(qid)
 
     def update_review(self, qid: str, correct: bool, today: Optional[date] = None):
+        self._ensure_loaded()
         if qid not in self.history:
             self.add_question(qid, today)
         today = today or date.today()
         q = self.history[qid]
+        self._unindex_due(qid)
         if correct:
             q["ease_factor"] = min(3.0, q["ease_factor"] + 0.1)
             # exponential growth controlled by ease_factor
-            q["interval"] = max(1, int(q["interval"] * q["ease_factor"]))
+            q["interval"] = min(MAX_INTERVAL, max(1, int(q["interval"] * q["ease_factor"])))
         else:
             q["ease_factor"] = max(1.3, q["ease_factor"] - 0.25)
             q["interval"] = 1
         q["last_seen"] = today
         q["next_due"] = today + timedelta(days=q["interval"])
         self.history[qid] = q
+        self._index_due(qid, q["next_due"])
+        self._mark_dirty(qid)
 
     def get_due_today(self, today: Optional[date] = None, limit: Optional[int] = None) -> List[str]:
+        """Due question ids, most overdue first."""
+        self._ensure_loaded()
         today = today or date.today()
-        due = [qid for qid, meta in self.history.items() if meta["next_due"] <= today]
-        if limit:
-            return due[:limit]
+        end = bisect.bisect_right(self._due_days, today.toordinal())
+        due: List[str] = []
+        for day in self._due_days[:end]:
+            for qid in self._due_buckets[day]:
+                if limit and len(due) >= limit:
+                    return due
+                due.append(qid)
         return due
 
     def summary(self):
+        self._ensure_loaded()
         return {
             qid: {
                 "interval_days": v["interval"],
@@ -0,0 +1,82 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from unique_question_generator.async_generator import AsyncQuestionGenerator
+from unique_question_generator.generator import QuestionExhaustionError
+
+
+class FakeAsyncLLM:
+    """Async paraphraser with injected latency; records peak concurrency and call count."""
+
+    def __init__(self, latency: float = 0.01, fail_first: int = 0, duplicate_first: int = 0):
+        self.latency = latency
+        self.fail_first = fail_first
+        self.duplicate_first = duplicate_first  # first N calls all return the same text
+        self.calls = 0
+        self.in_flight = 0
+        self.peak = 0
+
+    async def paraphrase(self, text, difficulty="medium"):
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            if self.calls <= self.fail_first:
+                raise RuntimeError("llm unavailable")
+            if self.calls <= self.duplicate_first:
+                return "duplicate paraphrase"
+            return f"{text} (async)"
+        finally:
+            self.in_flight -= 1
+
+
+def _sqlite_questions():
+    db = sqlite3.connect(":memory:", check_same_thread=False)
+    db.execute("CREATE TABLE questions (post_hash TEXT PRIMARY KEY)")
+    return db
+
+
+def test_semaphore_caps_llm_calls_in_flight():
+    llm = FakeAsyncLLM(latency=0.02)
+    gen = AsyncQuestionGenerator(llm=llm, seed=0, max_concurrency=3)
+    out = asyncio.run(gen.agenerate_many(12, "arrays", 1))
+    assert len({q["post_hash"] for q in out}) == 12
+    assert llm.peak == 3
+
+
+def test_timeout_retries_then_falls_back_to_swap_paraphrase():
+    llm = FakeAsyncLLM(latency=1.0)
+    gen = AsyncQuestionGenerator(llm=llm, seed=0, timeout=0.01, retries=2, backoff=0.0)
+    q = asyncio.run(gen.agenerate_unique_question("arrays", 1))
+    assert llm.calls == 3
+    assert q["question"] == gen._swap_paraphrase(q["template"])
+
+
+def test_retry_recovers_after_transient_error():
+    llm = FakeAsyncLLM(latency=0.0, fail_first=1)
+    gen = AsyncQuestionGenerator(llm=llm, seed=0, retries=2, backoff=0.0)
+    q = asyncio.run(gen.agenerate_unique_question("arrays", 1))
+    assert llm.calls == 2
+    assert q["question"] == f"{q['template']} (async)"
+
+
+def test_concurrent_calls_never_accept_the_same_post_hash():
+    # the first round of paraphrases is identical and the DB check runs in a thread,
+    # so all three calls race on one hash; the in-flight claim must dedupe them
+    llm = FakeAsyncLLM(latency=0.0, duplicate_first=3)
+    gen = AsyncQuestionGenerator(_sqlite_questions(), llm=llm, seed=0)
+    out = asyncio.run(gen.agenerate_many(3, "arrays", 1))
+    hashes = [q["post_hash"] for q in out]
+    assert len(set(hashes)) == 3
+
+
+def test_exhaustion_keeps_questions_other_tasks_generated():
+    gen = AsyncQuestionGenerator(llm=FakeAsyncLLM(latency=0.0), seed=0)
+    capacity = gen.remaining_capacity()
+    with pytest.raises(QuestionExhaustionError) as exc:
+        asyncio.run(gen.agenerate_many(capacity + 5, "arrays", 1))
+    assert len(exc.value.partial) == capacity
+    assert {q["post_hash"] for q in exc.value.partial} == gen.used_hashes
@@ -0,0 +1,77 @@
+import random
+from datetime import date, timedelta
+
+from spaced_repetition.columnar import ColumnarScheduler
+from spaced_repetition.repetition_scheduler import SpacedRepetitionScheduler
+
+START = date(2026, 1, 1)
+
+
+def _trajectories(seed, learners=300, cards=10, reviews=12):
+    """(user_id, qid, correct, day) events; each card gets `reviews` random outcomes."""
+    rng = random.Random(seed)
+    events = []
+    for u in range(learners):
+        for c in range(cards):
+            day = START
+            for _ in range(reviews):
+                day += timedelta(days=rng.randrange(0, 30))
+                events.append((u, f"q{c}", rng.random() < 0.8, day))
+    events.sort(key=lambda e: e[3])
+    return events
+
+
+def test_update_reviews_matches_reference_scheduler():
+    events = _trajectories(seed=7)
+    ref = {}
+    for u, qid, ok, day in events:
+        ref.setdefault(u, SpacedRepetitionScheduler()).update_review(qid, ok, day)
+
+    col = ColumnarScheduler()
+    by_day = {}
+    for e in events:
+        by_day.setdefault(e[3], []).append(e)
+    for day in sorted(by_day):
+        batch = by_day[day]  # may repeat a card within one batch
+        col.update_reviews([e[0] for e in batch], [e[1] for e in batch], [e[2] for e in batch], day)
+
+    assert len(col) == sum(len(s.history) for s in ref.values())
+    for row in range(len(col)):
+        meta = ref[col.users[col.user[row]]].history[col.qids[col.qid[row]]]
+        assert float(col.ease_factor[row]) == meta["ease_factor"]
+        assert int(col.interval[row]) == meta["interval"]
+        assert col.next_due[row] == meta["next_due"].toordinal()
+        assert col.last_seen[row] == meta["last_seen"].toordinal()
+
+
+def test_due_queries_match_reference_scheduler():
+    events = _trajectories(seed=3, learners=20)
+    ref = {}
+    col = ColumnarScheduler()
+    for u, qid, ok, day in events:
+        ref.setdefault(u, SpacedRepetitionScheduler()).update_review(qid, ok, day)
+        col.update_review(u, qid, ok, day)
+    today = START + timedelta(days=200)
+    for u, sched in ref.items():
+        assert set(col.get_due_today(u, today)) == set(sched.get_due_today(today))
+
+
+def test_million_card_load_keeps_index_consistent():
+    col = ColumnarScheduler()
+    qids = [f"q{i}" for i in range(20)]
+    learners = 60_000  # 1.2M cards, 50 learners per call
+    for first in range(0, learners, 50):
+        users = [u for u in range(first, first + 50) for _ in qids]
+        col.add_questions(users, qids * 50, START)
+        # the unsorted tail stays small, so no call copies the whole index
+        assert len(col._tail) <= max(4096, 16 * int(len(col) ** 0.5))
+    assert len(col) == learners * 20
+
+    probe = [0, 12_345, learners - 1]  # merged and tail rows alike
+    col.update_reviews(probe, ["q7"] * 3, [False] * 3, START + timedelta(days=1))
+    assert len(col) == learners * 20
+    for u in probe:
+        assert col.get_due_today(u, START + timedelta(days=1)) == [q for q in qids if q != "q7"]
+        assert col.get_due_today(u, START + timedelta(days=2))[-1] == "q7"
+        rows = col._user_rows(u)
+        assert sorted(col.qids[c] for c in col.qid[rows]) == sorted(qids)
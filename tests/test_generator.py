@@ -0,0 +1,64 @@
+import sqlite3
+
+import pytest
+
+from benchmarks.fakes import FakeLLM
+from unique_question_generator.generator import QuestionExhaustionError, QuestionGenerator
+
+
+def _db(hashes=()):
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE questions (post_hash TEXT PRIMARY KEY)")
+    db.executemany("INSERT INTO questions VALUES (?)", [(h,) for h in hashes])
+    db.commit()
+    statements = []
+    db.set_trace_callback(statements.append)
+    return db, statements
+
+
+def _all_hashes(seed=0):
+    probe = QuestionGenerator(llm=FakeLLM(), seed=seed)
+    return [probe._hash(probe._llm_paraphrase(base)) for base in probe.space]
+
+
+def test_existing_hashes_uses_chunked_in_queries():
+    every = _all_hashes()
+    db, statements = _db(every[:100])
+    gen = QuestionGenerator(db, llm=FakeLLM())
+    probe = every[:100] + [f"missing{i}" for i in range(1100)]
+    assert gen._existing_hashes(probe, chunk=500) == set(every[:100])
+    selects = [s for s in statements if s.startswith("SELECT post_hash FROM questions WHERE post_hash IN")]
+    assert len(selects) == 3
+
+
+def test_warm_bloom_skips_db_for_unseen_hashes():
+    every = _all_hashes()
+    db, statements = _db(every[-10:])  # same seed: the first draws are not in the DB
+    gen = QuestionGenerator(db, llm=FakeLLM(), seed=0)
+    gen.warm_bloom()
+    statements.clear()
+    out = [gen.generate_unique_question("arrays", 1) for _ in range(20)]
+    assert not {q["post_hash"] for q in out} & set(every[-10:])
+    assert not [s for s in statements if s.startswith("SELECT 1 FROM questions")]
+
+
+def test_generate_many_skips_hashes_already_in_db():
+    every = _all_hashes(seed=0)
+    db, _ = _db(every[::2])
+    gen = QuestionGenerator(db, llm=FakeLLM(), seed=0)
+    out = gen.generate_many(50, "arrays", 1)
+    assert len({q["post_hash"] for q in out}) == 50
+    assert not {q["post_hash"] for q in out} & set(every[::2])
+
+
+def test_exhaustion_only_when_space_is_empty_and_keeps_partial():
+    every = _all_hashes()
+    gen = QuestionGenerator(llm=FakeLLM(), used_hashes=set(every[:-5]), seed=1)
+    assert gen.generate_unique_question("arrays", 1)["post_hash"] in every[-5:]
+    with pytest.raises(QuestionExhaustionError) as exc:
+        gen.generate_many(10, "arrays", 1)
+    assert len(exc.value.partial) == 4
+    assert {q["post_hash"] for q in exc.value.partial} <= gen.used_hashes
+    assert gen.remaining_capacity() == 0
+    with pytest.raises(QuestionExhaustionError):
+        gen.generate_unique_question("arrays", 1)
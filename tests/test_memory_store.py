@@ -0,0 +1,39 @@
+import random
+
+from brain_memory.memory_context import MemoryContext
+from brain_memory.memory_store import MemoryStore
+
+
+def _traces(seed, learners=200, attempts=30):
+    rng = random.Random(seed)
+    return [[(f"t{rng.randrange(15)}", rng.random() < 0.5) for _ in range(attempts)] for _ in range(learners)]
+
+
+def _fill(traces):
+    store, refs = MemoryStore(capacity=4, topic_capacity=2), []
+    for uid, trace in enumerate(traces):
+        ref = MemoryContext()
+        for topic, ok in trace:
+            store.record_attempt(uid, topic, ok)
+            ref.record_attempt(topic, ok)
+        refs.append(ref)
+    return store, refs
+
+
+def test_learner_view_matches_memory_context():
+    store, refs = _fill(_traces(seed=11))
+    for uid, ref in enumerate(refs):
+        view = store.learner(uid)
+        assert list(view.topic_stats.items()) == list(ref.topic_stats.items())
+        for k in (1, 3, 5, 20):
+            assert view.analyze_weakness(top_k=k) == ref.analyze_weakness(top_k=k)
+
+
+def test_snapshot_round_trip_keeps_learner_order(tmp_path):
+    store, refs = _fill(_traces(seed=5, learners=20))
+    store.save(str(tmp_path))
+    loaded = MemoryStore.load(str(tmp_path))
+    loaded.record_attempt(3, "brand-new", False)
+    refs[3].record_attempt("brand-new", False)
+    for uid, ref in enumerate(refs):
+        assert loaded.learner(uid).analyze_weakness(top_k=4) == ref.analyze_weakness(top_k=4)
@@ -0,0 +1,44 @@
+import json
+import multiprocessing
+import os
+
+import pytest
+
+from attempt_pipeline import engine
+from attempt_pipeline.engine import run_pipeline
+from spaced_repetition.repetition_scheduler import MAX_INTERVAL, SpacedRepetitionScheduler
+
+
+def _drill(n, user_id=1):
+    return [{"user_id": user_id, "qid": "Q1", "topic": "Arrays", "correct": True,
+             "time_s": 20.0, "hints_used": 0, "date": "2026-10-18"} for _ in range(n)]
+
+
+def test_long_streak_is_capped_and_exported(tmp_path):
+    stats = run_pipeline(_drill(40), workers=1, batch_size=7, out_dir=str(tmp_path))
+    assert stats[0]["events"] == 40
+    with open(tmp_path / "shard-0" / "schedule.jsonl", encoding="utf-8") as f:
+        (row,) = [json.loads(line) for line in f]
+
+    ref = SpacedRepetitionScheduler()
+    for e in _drill(40):
+        ref.update_review(e["qid"], e["correct"], engine._event_day(e))
+    meta = ref.history["Q1"]
+    assert row["interval"] == meta["interval"] == MAX_INTERVAL
+    assert row["ease_factor"] == meta["ease_factor"]
+    assert row["next_due"] == meta["next_due"].isoformat()
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_killed_worker_fails_the_run_instead_of_hanging(monkeypatch):
+    process_batch = engine.ShardState.process_batch
+
+    def dying(self, events):
+        if any(e["user_id"] == "kill" for e in events):
+            os._exit(9)  # like an OOM kill: no report, no traceback
+        process_batch(self, events)
+
+    monkeypatch.setattr(engine.ShardState, "process_batch", dying)
+    events = _drill(50, user_id=2) + _drill(1, user_id="kill") + _drill(50, user_id=3)
+    with pytest.raises(RuntimeError, match="without reporting"):
+        run_pipeline(events, workers=2, batch_size=4, queue_size=1)
@@ -0,0 +1,118 @@
+import gc
+import sqlite3
+from datetime import date
+
+import pytest
+
+import spaced_repetition.repetition_scheduler as rs
+from spaced_repetition.repetition_scheduler import ReviewScheduleStore, SpacedRepetitionScheduler
+
+DAY = date(2026, 1, 1)
+
+
+class CountingCursor(sqlite3.Cursor):
+    def execute(self, sql, *args):
+        self.connection.log.append(("execute", sql.split()[0]))
+        return super().execute(sql, *args)
+
+    def executemany(self, sql, params):
+        if self.connection.fail_writes:
+            self.connection.fail_writes -= 1
+            raise sqlite3.OperationalError("database is locked")
+        self.connection.log.append(("executemany", sql.split()[0]))
+        return super().executemany(sql, params)
+
+
+class CountingConnection(sqlite3.Connection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.log = []
+        self.fail_writes = 0
+        self.fail_loads = 0
+
+    def cursor(self, factory=CountingCursor):
+        if self.fail_loads:
+            self.fail_loads -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return super().cursor(factory)
+
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(":memory:", factory=CountingConnection)
+    ReviewScheduleStore(conn).ensure_schema()
+    conn.log.clear()
+    return conn
+
+
+def _stored(db, user_id=1):
+    return ReviewScheduleStore(db).load(user_id)
+
+
+def _seed_row(db, qid="Q1", interval=120, ease=3.0):
+    ReviewScheduleStore(db).upsert_many(1, [(qid, {"last_seen": DAY, "interval": interval, "ease_factor": ease,
+                                                   "next_due": date.fromordinal(DAY.toordinal() + interval)})])
+    db.log.clear()
+
+
+def test_loads_on_first_use_only(db):
+    _seed_row(db)
+    sched = SpacedRepetitionScheduler(db, user_id=1)
+    assert db.log == []
+    sched.update_review("Q1", True, DAY)
+    sched.get_due_today(DAY)
+    assert db.log == [("execute", "SELECT")]
+    assert sched.history["Q1"]["interval"] == 360
+
+
+def test_failed_load_is_retried_and_never_overwrites_stored_rows(db):
+    _seed_row(db)
+    sched = SpacedRepetitionScheduler(db, user_id=1, flush_size=1)
+    db.fail_loads = 1
+    with pytest.raises(sqlite3.OperationalError):
+        sched.update_review("Q1", True, DAY)
+    sched.update_review("Q1", True, DAY)
+    assert _stored(db)["Q1"]["interval"] == 360
+    assert _stored(db)["Q1"]["ease_factor"] == 3.0
+
+
+def test_flushes_in_one_executemany_at_size_threshold(db):
+    sched = SpacedRepetitionScheduler(db, user_id=1, flush_size=3, flush_interval=3600)
+    sched.update_review("Q1", True, DAY)
+    sched.update_review("Q2", False, DAY)
+    assert not [op for op in db.log if op[0] == "executemany"]
+    sched.update_review("Q3", True, DAY)
+    assert [op for op in db.log if op[0] == "executemany"] == [("executemany", "INSERT")]
+    assert set(_stored(db)) == {"Q1", "Q2", "Q3"}
+
+
+def test_flushes_at_time_threshold(db, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(rs.time, "monotonic", lambda: clock[0])
+    sched = SpacedRepetitionScheduler(db, user_id=1, flush_size=100, flush_interval=5.0)
+    sched.update_review("Q1", True, DAY)
+    sched.update_review("Q2", True, DAY)
+    assert _stored(db) == {}
+    clock[0] += 5.0
+    sched.update_review("Q3", True, DAY)
+    assert [op for op in db.log if op[0] == "executemany"] == [("executemany", "INSERT")]
+    assert set(_stored(db)) == {"Q1", "Q2", "Q3"}
+
+
+def test_rows_stay_dirty_after_failed_flush(db):
+    sched = SpacedRepetitionScheduler(db, user_id=1, flush_size=100)
+    sched.update_review("Q1", True, DAY)
+    sched.update_review("Q2", False, DAY)
+    db.fail_writes = 1
+    assert sched.flush() == 0
+    assert _stored(db) == {}
+    assert sched.flush() == 2
+    assert set(_stored(db)) == {"Q1", "Q2"}
+
+
+def test_pending_rows_flushed_when_scheduler_is_collected(db):
+    sched = SpacedRepetitionScheduler(db, user_id=1, flush_size=100)
+    sched.update_review("Q1", True, DAY)
+    del sched
+    gc.collect()
+    assert set(_stored(db)) == {"Q1"}
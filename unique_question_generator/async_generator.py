@@ -0,0 +1,101 @@
+# async_generator.py
+from __future__ import annotations
+import asyncio
+import inspect
+from typing import Dict, List, Optional, Set
+
+from instrumentation.metrics import COUNT_BUCKETS, get_metrics
+from unique_question_generator.generator import QuestionGenerator, QuestionExhaustionError
+
+
+class AsyncQuestionGenerator(QuestionGenerator):
+    """
+    asyncio variant of QuestionGenerator for running many LLM paraphrases at once.
+    - `llm.paraphrase` may be a coroutine function; a sync one runs in a worker thread.
+    - At most `max_concurrency` calls in flight, each bounded by `timeout` seconds,
+      retried `retries` times with exponential backoff, then falls back to the
+      deterministic swap paraphrase.
+    - post_hash is claimed before any await, so concurrent calls never return
+      the same question.
+    """
+
+    def __init__(self, *args, max_concurrency: int = 8, timeout: float = 10.0, retries: int = 2,
+                 backoff: float = 0.25, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._claimed: Set[str] = set()  # hashes being checked against the DB
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+        return self._sem
+
+    async def _call_llm(self, text: str, difficulty: str) -> str:
+        if inspect.iscoroutinefunction(self.llm.paraphrase):
+            return await self.llm.paraphrase(text, difficulty=difficulty)
+        return await asyncio.to_thread(self.llm.paraphrase, text, difficulty=difficulty)
+
+    async def _allm_paraphrase(self, text: str, difficulty: str = "medium") -> str:
+        if self.llm:
+            for attempt in range(self.retries + 1):
+                try:
+                    async with self._semaphore():
+                        with get_metrics().timer("generator.llm_paraphrase"):
+                            return await asyncio.wait_for(self._call_llm(text, difficulty), self.timeout)
+                except Exception:
+                    get_metrics().incr("generator.llm_errors")
+                    if attempt < self.retries:
+                        await asyncio.sleep(self.backoff * (2 ** attempt))
+        return self._swap_paraphrase(text)
+
+    async def _aexists(self, h: str) -> bool:
+        if h in self.used_hashes or h in self._claimed:
+            return True
+        if not self.db or (self._bloom_covers_db and h not in self.bloom):
+            return False
+        self._claimed.add(h)
+        try:
+            return await asyncio.to_thread(self._exists, h)
+        finally:
+            self._claimed.discard(h)
+
+    async def agenerate_unique_question(self, topic: str, week: int, difficulty: str = "medium",
+                                        max_attempts: Optional[int] = None) -> Dict:
+        attempts = 0
+        max_attempts = max_attempts or self.max_attempts
+        while max_attempts is None or attempts < max_attempts:
+            if not self.space.remaining:
+                get_metrics().incr("generator.exhausted")
+                raise QuestionExhaustionError(f"All {self.space.size} template combinations used.")
+            attempts += 1
+            base = self._compose()
+            paraphrased = await self._allm_paraphrase(base, difficulty)
+            post_hash = self._hash(paraphrased)
+            if not await self._aexists(post_hash):
+                get_metrics().observe("generator.attempts_per_success", attempts, COUNT_BUCKETS)
+                return self._accept(paraphrased, base, topic, week, difficulty, post_hash)
+        get_metrics().incr("generator.exhausted")
+        raise QuestionExhaustionError(f"No unique question after {max_attempts} attempts.")
+
+    async def agenerate_many(self, n: int, topic: str, week: int, difficulty: str = "medium") -> List[Dict]:
+        """
+        Generate n unique questions with up to max_concurrency paraphrases in flight.
+        If the template space runs out, QuestionExhaustionError.partial holds
+        the questions the other tasks generated.
+        """
+        results = await asyncio.gather(
+            *(self.agenerate_unique_question(topic, week, difficulty) for _ in range(n)),
+            return_exceptions=True
+        )
+        out = [r for r in results if not isinstance(r, BaseException)]
+        errors = [r for r in results if isinstance(r, BaseException)]
+        for err in errors:
+            if not isinstance(err, QuestionExhaustionError):
+                raise err
+        if errors:
+            raise QuestionExhaustionError(f"Only {len(out)} of {n} unique questions could be generated.", out)
+        return out
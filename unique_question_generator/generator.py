@@ -2,8 +2,12 @@
 from __future__ import annotations
 import random
 import hashlib
+import math
+import sqlite3
 import time
-from typing import Dict, List, Optional, Set, Any
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Any
+
+from instrumentation.metrics import COUNT_BUCKETS, get_metrics
 
 TEMPLATES = [
     "Write an algorithm to find the {target} in a {structure} of size {n}.",
@@ -19,29 +23,123 @@ VARIABLES = {
 
 
 class QuestionExhaustionError(RuntimeError):
-    pass
+    """Raised when no unique question is left; `partial` holds any questions accepted before that."""
+
+    def __init__(self, message: str, partial: Optional[List[Dict]] = None):
+        super().__init__(message)
+        self.partial = partial or []
+
+
+class TemplateSpace:
+    """
+    Lazy, seeded, non-repeating walk over TEMPLATES x VARIABLES.
+    - Each combination is a mixed-radix index in [0, size).
+    - Order is the affine permutation i -> (a*i + c) mod size with gcd(a, size) = 1,
+      so nothing is materialized and every index is produced exactly once.
+    """
+
+    def __init__(self, templates: Optional[List[str]] = None, variables: Optional[Dict[str, List[Any]]] = None,
+                 seed: Optional[int] = None):
+        self.templates = templates or TEMPLATES
+        self.variables = variables or VARIABLES
+        self.keys = list(self.variables)
+        self.radices = [len(self.templates)] + [len(self.variables[k]) for k in self.keys]
+        self.size = math.prod(self.radices)
+        rng = random.Random(seed)
+        a = rng.randrange(1, max(2, self.size))
+        while math.gcd(a, self.size) != 1:
+            a = rng.randrange(1, max(2, self.size))
+        self._a = a
+        self._c = rng.randrange(self.size) if self.size else 0
+        self._pos = 0
+
+    @property
+    def remaining(self) -> int:
+        """Combinations not yet handed out."""
+        return self.size - self._pos
+
+    def compose(self, idx: int) -> str:
+        """Decode a mixed-radix index into its filled template."""
+        idx, t = divmod(idx, self.radices[0])
+        values = {}
+        for key, radix in zip(self.keys, self.radices[1:]):
+            idx, r = divmod(idx, radix)
+            values[key] = self.variables[key][r]
+        return self.templates[t].format(**values)
+
+    def next_index(self) -> Optional[int]:
+        if self._pos >= self.size:
+            return None
+        idx = (self._a * self._pos + self._c) % self.size
+        self._pos += 1
+        return idx
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            idx = self.next_index()
+            if idx is None:
+                return
+            yield self.compose(idx)
+
+
+class BloomFilter:
+    """
+    Bit-array Bloom filter over hex SHA-256 digests (post_hash).
+    The k probe positions come from double hashing two 64-bit slices of the digest.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.01):
+        self.m = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.k = max(1, round(self.m / capacity * math.log(2)))
+        self.bits = bytearray((self.m + 7) // 8)
+
+    def _probes(self, h: str) -> Iterator[int]:
+        h1, h2 = int(h[:16], 16), int(h[16:32], 16) | 1
+        for i in range(self.k):
+            yield (h1 + i * h2) % self.m
+
+    def add(self, h: str):
+        for p in self._probes(h):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+    def update(self, hashes: Iterable[str]):
+        for h in hashes:
+            self.add(h)
+
+    def __contains__(self, h: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._probes(h))
 
 
 class QuestionGenerator:
     """
     Template + controlled LLM paraphrase based generator.
     Inject `llm` with .paraphrase(text, temperature) -> str for production.
+    Template combinations are enumerated without repeats (see TemplateSpace);
+    pass `seed` for a reproducible order.
+    Call warm_bloom() once to load the DB hashes into a Bloom filter; after that
+    hashes the filter has never seen skip the DB lookup entirely.
     """
 
-    def __init__(self, db_client: Optional[Any] = None, llm: Optional[Any] = None, used_hashes: Optional[Set[str]] = None):
+    def __init__(self, db_client: Optional[Any] = None, llm: Optional[Any] = None, used_hashes: Optional[Set[str]] = None,
+                 seed: Optional[int] = None, bloom_capacity: int = 1_000_000):
         self.db = db_client
         self.llm = llm
         self.used_hashes = used_hashes if used_hashes is not None else set()
-        self.max_attempts = 12
+        self.max_attempts: Optional[int] = None  # None: keep drawing until the template space is exhausted
+        self.space = TemplateSpace(seed=seed)
+        self.bloom = BloomFilter(capacity=bloom_capacity)
+        self.bloom.update(self.used_hashes)
+        self._bloom_covers_db = False  # True once warm_bloom() loaded the questions table
+
+    def remaining_capacity(self) -> int:
+        """Number of template combinations not yet tried by this generator."""
+        return self.space.remaining
 
     def _compose(self) -> str:
-        template = random.choice(TEMPLATES)
-        filled = template.format(
-            target=random.choice(VARIABLES["target"]),
-            structure=random.choice(VARIABLES["structure"]),
-            n=random.choice(VARIABLES["n"])
-        )
-        return filled
+        idx = self.space.next_index()
+        if idx is None:
+            raise QuestionExhaustionError(f"All {self.space.size} template combinations used.")
+        return self.space.compose(idx)
 
     def _hash(self, text: str) -> str:
         return hashlib.sha256(text.strip().lower().encode()).hexdigest()
@@ -49,9 +147,13 @@ class QuestionGenerator:
     def _llm_paraphrase(self, text: str, difficulty: str = "medium") -> str:
         if self.llm:
             try:
-                return self.llm.paraphrase(text, difficulty=difficulty)
+                with get_metrics().timer("generator.llm_paraphrase"):
+                    return self.llm.paraphrase(text, difficulty=difficulty)
             except Exception:
-                pass
+                get_metrics().incr("generator.llm_errors")
+        return self._swap_paraphrase(text)
+
+    def _swap_paraphrase(self, text: str) -> str:
         # deterministic lightweight paraphrase fallback
         swaps = {"Write": "Design", "Design": "Construct", "How would you determine": "Determine"}
         out = text
@@ -59,14 +161,54 @@ class QuestionGenerator:
             out = out.replace(k, v)
         return out
 
+    def warm_bloom(self):
+        """Load every post_hash from the questions table into the Bloom filter (one scan)."""
+        if not self.db:
+            return
+        cur = self.db.cursor()
+        cur.execute("SELECT post_hash FROM questions")
+        while True:
+            rows = cur.fetchmany(10_000)
+            if not rows:
+                break
+            self.bloom.update(r[0] for r in rows)
+        self._bloom_covers_db = True
+
+    def _placeholder(self) -> str:
+        return "?" if isinstance(self.db, sqlite3.Connection) else "%s"
+
+    def _existing_hashes(self, hashes: List[str], chunk: int = 500) -> Set[str]:
+        """Set-based lookup: which of `hashes` are already in the questions table."""
+        found: Set[str] = set()
+        if not self.db or not hashes:
+            return found
+        try:
+            with get_metrics().timer("generator.db_existing_batch"):
+                cur = self.db.cursor()
+                if isinstance(self.db, sqlite3.Connection):
+                    for i in range(0, len(hashes), chunk):
+                        part = hashes[i:i + chunk]
+                        cur.execute(f"SELECT post_hash FROM questions WHERE post_hash IN ({','.join('?' * len(part))})", part)
+                        found.update(r[0] for r in cur.fetchall())
+                else:
+                    cur.execute("SELECT post_hash FROM questions WHERE post_hash = ANY(%s)", (list(hashes),))
+                    found.update(r[0] for r in cur.fetchall())
+        except Exception:
+            pass
+        return found
+
     def _exists(self, h: str) -> bool:
         if h in self.used_hashes:
             return True
+        if self._bloom_covers_db and h not in self.bloom:
+            get_metrics().incr("generator.bloom_skips")
+            return False
         if self.db:
             try:
-                cur = self.db.cursor()
-                cur.execute("SELECT 1 FROM questions WHERE post_hash = %s LIMIT 1", (h,))
-                return cur.fetchone() is not None
+                with get_metrics().timer("generator.db_exists"):
+                    cur = self.db.cursor()
+                    cur.execute(f"SELECT 1 FROM questions WHERE post_hash = {self._placeholder()} LIMIT 1", (h,))
+                    return cur.fetchone() is not None
             except Exception:
                 pass
         return False
@@ -74,21 +216,57 @@ class QuestionGenerator:
     def generate_unique_question(self, topic: str, week: int, difficulty: str = "medium", max_attempts: Optional[int] = None) -> Dict:
         attempts = 0
         max_attempts = max_attempts or self.max_attempts
-        while attempts < max_attempts:
+        while max_attempts is None or attempts < max_attempts:
+            if not self.space.remaining:
+                get_metrics().incr("generator.exhausted")
+                raise QuestionExhaustionError(f"All {self.space.size} template combinations used.")
             attempts += 1
             base = self._compose()
             paraphrased = self._llm_paraphrase(base, difficulty)
             post_hash = self._hash(paraphrased)
             if not self._exists(post_hash):
-                self.used_hashes.add(post_hash)
-                q = {
-                    "question": paraphrased,
-                    "template": base,
-                    "topic": topic,
-                    "week": week,
-                    "difficulty": difficulty,
-                    "post_hash": post_hash,
-                    "created_at": int(time.time())
-                }
-                return q
-        raise QuestionExhaustionError("Unable to generate unique question after attempts.")
+                get_metrics().observe("generator.attempts_per_success", attempts, COUNT_BUCKETS)
+                return self._accept(paraphrased, base, topic, week, difficulty, post_hash)
+        get_metrics().incr("generator.exhausted")
+        raise QuestionExhaustionError(f"No unique question after {max_attempts} attempts.")
+
+    def _accept(self, question: str, base: str, topic: str, week: int, difficulty: str, post_hash: str) -> Dict:
+        self.used_hashes.add(post_hash)
+        self.bloom.add(post_hash)
+        return {
+            "question": question,
+            "template": base,
+            "topic": topic,
+            "week": week,
+            "difficulty": difficulty,
+            "post_hash": post_hash,
+            "created_at": int(time.time())
+        }
+
+    def generate_many(self, n: int, topic: str, week: int, difficulty: str = "medium") -> List[Dict]:
+        """
+        Generate n unique questions, checking each batch of candidates with
+        one set-based DB query. Candidates the Bloom filter rules out never
+        reach the DB once warm_bloom() has run. If the template space runs out
+        first, QuestionExhaustionError.partial holds the questions generated.
+        """
+        out: List[Dict] = []
+        while len(out) < n:
+            bases = []
+            for _ in range(min(n - len(out), self.space.remaining)):
+                bases.append(self._compose())
+            if not bases:
+                # accepted questions are already in used_hashes: hand them back, don't drop them
+                raise QuestionExhaustionError(f"Only {len(out)} of {n} unique questions could be generated.", out)
+            cands: Dict[str, tuple] = {}
+            for base in bases:
+                paraphrased = self._llm_paraphrase(base, difficulty)
+                cands.setdefault(self._hash(paraphrased), (paraphrased, base))
+            fresh = [h for h in cands if h not in self.used_hashes]
+            to_check = [h for h in fresh if h in self.bloom] if self._bloom_covers_db else fresh
+            taken = self._existing_hashes(to_check)
+            for h in fresh:
+                if h not in taken:
+                    paraphrased, base = cands[h]
+                    out.append(self._accept(paraphrased, base, topic, week, difficulty, h))
+        return out